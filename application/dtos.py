@@ -1,23 +1,33 @@
+import sys
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from pathlib import Path
+from typing import Any, Dict, List, Optional
 
+# One FileData per installed file; slotted where dataclasses support it (Python 3.10+)
+_DATACLASS_SLOTS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(**_DATACLASS_SLOTS)
 class FileData:
     relative_path: str
-    content: bytes
+    content: Optional[bytes] = None
+    source_path: Optional[Path] = None  # Installed file on disk, streamed instead of held in memory
 
 
 @dataclass
 class CacheRequest:
     manager: str
     versions: Dict[str, str]
-    lockfile_content: bytes
-    manifest_content: bytes
+    lockfile_content: bytes = b''
+    manifest_content: bytes = b''
     custom_args: Optional[List[str]] = None
+    client_hash: Optional[str] = None
+    # Uploaded files already on disk; used instead of the *_content fields when set
+    manifest_path: Optional[Path] = None
+    lockfile_path: Optional[Path] = None
 
 
-@dataclass
+@dataclass(frozen=True)
 class CacheResponse:
     bundle_hash: str
     download_url: str
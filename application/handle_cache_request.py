@@ -1,14 +1,187 @@
+import hashlib
+import logging
 import tempfile
 import shutil
 import os
+import string
+import threading
 from pathlib import Path
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, FrozenSet, Hashable, List, Optional, Tuple
 
-from domain.dependency_set import DependencySet, DependencyFile
-from domain.installer import InstallerFactory
+from domain.dependency_set import DependencySet, DependencyFile, calculate_path_hash
+from domain.hash_constants import HASH_ALGORITHM, HASH_HEX_LENGTH
+from domain.installer import DependencyInstaller, InstallerFactory
 from infrastructure.file_system_cache_repository import FileSystemCacheRepository
 from infrastructure.docker_utils import DockerUtils
-from application.dtos import CacheRequest, CacheResponse, FileData, InstallationResult
+from application.dtos import CacheRequest, CacheResponse, InstallationResult
+
+# Maximum number of installers kept for reuse across requests
+INSTALLER_CACHE_SIZE = 256
+
+# Default number of package installations allowed to run at the same time
+MAX_CONCURRENT_INSTALLS = 4
+
+# Number of recently seen cached bundle hashes remembered in memory
+HIT_CACHE_SIZE = 4096
+
+# Idle install workspaces kept per (manager, versions) for reuse
+WORKSPACE_POOL_SIZE = MAX_CONCURRENT_INSTALLS
+
+# Idle install workspaces kept across all keys; the least recently used are removed first
+WORKSPACE_POOL_MAX_IDLE = 16
+
+# Managers whose install keeps an existing output folder when a lockfile is present.
+# npm ci always deletes node_modules first, and without a lockfile the previous
+# tree would leak into the result, so those installs get a fresh workspace.
+OUTPUT_REUSING_MANAGERS: FrozenSet[str] = frozenset({'composer'})
+
+# Threads used to write blobs to the cache concurrently
+BLOB_STORE_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+VersionsKey = Tuple[Tuple[str, str], ...]
+
+logger = logging.getLogger(__name__)
+
+
+# Per manager: (DependencySet keyword, supported_versions key, request keys in order of preference)
+_NODE_ALIASES = (
+    ('node_version', 'runtime', ('node', 'runtime')),
+    # yarn also uses npm_version in DependencySet
+    ('npm_version', 'package_manager', ('npm', 'yarn', 'package_manager')),
+)
+MANAGER_ALIASES: Dict[str, Tuple[Tuple[str, str, Tuple[str, ...]], ...]] = {
+    'npm': _NODE_ALIASES,
+    'yarn': _NODE_ALIASES,
+    'composer': (
+        ('php_version', 'runtime', ('php', 'runtime')),
+    ),
+}
+
+
+@lru_cache(maxsize=1024)
+def _version_kwargs(manager: str, versions_key: VersionsKey) -> VersionsKey:
+    """Map request versions to DependencySet keyword arguments."""
+    versions = dict(versions_key)
+    kwargs = []
+    
+    for kwarg, _, candidates in MANAGER_ALIASES.get(manager, ()):
+        for candidate in candidates:
+            if candidate in versions:
+                kwargs.append((kwarg, versions[candidate]))
+                break
+    
+    return tuple(kwargs)
+
+
+@lru_cache(maxsize=1024)
+def _normalize_versions(manager: str, versions_key: VersionsKey) -> FrozenSet[Tuple[str, str]]:
+    """Map request versions to the runtime/package_manager format of supported_versions."""
+    aliases = MANAGER_ALIASES.get(manager)
+    
+    # For other managers, use as-is
+    if aliases is None:
+        return frozenset(versions_key)
+    
+    versions = dict(versions_key)
+    normalized = []
+    
+    for _, supported_key, candidates in aliases:
+        for candidate in candidates:
+            if candidate in versions:
+                normalized.append((supported_key, versions[candidate]))
+                break
+    
+    return frozenset(normalized)
+
+
+class HitCache:
+    """Thread-safe LRU set of bundle hashes known to have an index in the cache."""
+    
+    def __init__(self, max_size: int = HIT_CACHE_SIZE):
+        self._max_size = max_size
+        self._entries: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __contains__(self, bundle_hash: str) -> bool:
+        with self._lock:
+            if bundle_hash not in self._entries:
+                return False
+            self._entries.move_to_end(bundle_hash)
+            return True
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+    
+    def add(self, bundle_hash: str) -> None:
+        """Remember a cached bundle hash, evicting the least recently used one when full."""
+        with self._lock:
+            self._entries[bundle_hash] = None
+            self._entries.move_to_end(bundle_hash)
+            if len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+    
+    def discard(self, bundle_hash: str) -> None:
+        """Forget a bundle hash, e.g. after its bundle was removed from the cache."""
+        with self._lock:
+            self._entries.pop(bundle_hash, None)
+
+
+class WorkspacePool:
+    """Idle install workspaces, kept per key so package managers can reuse their previous output."""
+    
+    def __init__(self, max_idle_per_key: int = WORKSPACE_POOL_SIZE, max_idle: int = WORKSPACE_POOL_MAX_IDLE):
+        self._max_idle_per_key = max_idle_per_key
+        self._max_idle = max_idle
+        # Idle workspace -> key, least recently released first
+        self._idle: "OrderedDict[Path, Hashable]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def acquire(self, key: Optional[Hashable]) -> Path:
+        """Take the most recently released idle workspace for key, or create a new one."""
+        if key is not None:
+            with self._lock:
+                for workspace, idle_key in reversed(self._idle.items()):
+                    if idle_key == key:
+                        del self._idle[workspace]
+                        return workspace
+        return Path(tempfile.mkdtemp(prefix="dep_cache_"))
+    
+    def release(self, key: Optional[Hashable], workspace: Path) -> None:
+        """Return a workspace for reuse, removing it or the least recently used ones when full."""
+        if key is None or self._max_idle_per_key <= 0 or self._max_idle <= 0:
+            self.discard(workspace)
+            return
+        
+        evicted = []
+        with self._lock:
+            if sum(1 for idle_key in self._idle.values() if idle_key == key) >= self._max_idle_per_key:
+                evicted.append(workspace)
+            else:
+                self._idle[workspace] = key
+                while len(self._idle) > self._max_idle:
+                    evicted.append(self._idle.popitem(last=False)[0])
+        
+        # Remove outside the lock, deleting a tree can take a while
+        for idle in evicted:
+            self.discard(idle)
+    
+    @staticmethod
+    def discard(workspace: Path) -> None:
+        """Remove a workspace that must not be reused."""
+        shutil.rmtree(workspace, ignore_errors=True)
+    
+    def close(self) -> None:
+        """Remove every idle workspace."""
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+        
+        for workspace in idle:
+            self.discard(workspace)
 
 
 class HandleCacheRequest:
@@ -20,57 +193,140 @@ class HandleCacheRequest:
         installer_factory: InstallerFactory,
         docker_utils: Optional[DockerUtils],
         supported_versions: Dict[str, List[Dict[str, str]]],
-        use_docker_on_version_mismatch: bool = False
+        use_docker_on_version_mismatch: bool = False,
+        install_slots: Optional[threading.Semaphore] = None,
+        hit_cache: Optional[HitCache] = None,
+        workspace_pool: Optional[WorkspacePool] = None
     ):
         self.cache_repository = cache_repository
         self.installer_factory = installer_factory
         self.docker_utils = docker_utils
         self.supported_versions = supported_versions
         self.use_docker_on_version_mismatch = use_docker_on_version_mismatch
+        self._installer_cache: Dict[Tuple, DependencyInstaller] = {}
+        # Lookups and installs use the installer cache from different threads
+        self._installer_cache_lock = threading.Lock()
+        # handle() runs on worker threads; bound how many installs run at once
+        self._install_slots = install_slots or threading.BoundedSemaphore(MAX_CONCURRENT_INSTALLS)
+        # Recently seen cached hashes
+        self._hit_cache = hit_cache if hit_cache is not None else HitCache()
+        # Without a pool every install gets a fresh workspace that is removed afterwards
+        self._workspace_pool = workspace_pool or WorkspacePool(max_idle_per_key=0)
+        # Supported versions as frozensets of (key, value) pairs for set-based matching
+        self._supported_index: Dict[str, FrozenSet[FrozenSet[Tuple[str, str]]]] = {
+            mgr: frozenset(frozenset(entry.items()) for entry in entries)
+            for mgr, entries in supported_versions.items()
+        }
+    
+    def close(self) -> None:
+        """Remove the idle workspaces kept for reuse."""
+        self._workspace_pool.close()
     
     def handle(self, request: CacheRequest) -> CacheResponse:
         """Process a cache request and return the response."""
+        cached, request_hash = self.lookup(request)
+        if cached is not None:
+            return cached
+        return self.install(request, request_hash)
+    
+    def lookup(self, request: CacheRequest) -> Tuple[Optional[CacheResponse], str]:
+        """
+        Look a request up in the cache without installing anything.
+        
+        Returns the hit response (or None on a miss) and the bundle hash
+        to pass to install() on a miss.
+        """
+        # Trust the client-supplied hash for the lookup so a cache hit
+        # never needs to build an installer or re-hash the uploaded files
+        client_hash = request.client_hash if self._is_valid_hash(request.client_hash) else None
+        if client_hash and self._is_cached(client_hash):
+            return CacheResponse(
+                bundle_hash=client_hash,
+                download_url=f"/download/{client_hash}.zip",
+                is_cache_hit=True
+            ), client_hash
+
         # Calculate request hash (based on manifest, lockfile, and versions)
         request_hash = self._calculate_bundle_hash(request)
-        
-        # Check if we have an index for this request (cache hit)
-        index_data = self.cache_repository.get_index(request_hash)
-        if index_data and self.cache_repository.has_bundle(request_hash):
+
+        if client_hash != request_hash:
+            if client_hash is not None:
+                # Clients may hash differently (e.g. analysis.md 5.2); the server
+                # hash is authoritative for lookups and storage
+                logger.warning(
+                    "Bundle hash mismatch: client sent %s, server calculated %s",
+                    client_hash, request_hash
+                )
+            
+            # Check the cache with the server hash
+            if self._is_cached(request_hash):
+                return CacheResponse(
+                    bundle_hash=request_hash,
+                    download_url=f"/download/{request_hash}.zip",
+                    is_cache_hit=True
+                ), request_hash
+        
+        return None, request_hash
+    
+    def install(self, request: CacheRequest, request_hash: str) -> CacheResponse:
+        """Install a request that missed the cache and store it under request_hash."""
+        # An identical install may have finished since the cache was checked
+        if self._is_cached(request_hash):
             return CacheResponse(
                 bundle_hash=request_hash,
                 download_url=f"/download/{request_hash}.zip",
                 is_cache_hit=True
             )
         
-        # Cache miss - determine installation method
+        # Determine installation method
         installation_method = self._determine_installation_method(
             request.manager, 
             request.versions
         )
         
-        # Install dependencies
-        if installation_method == 'docker':
-            installation_result = self._install_with_docker(request)
-        else:
-            installation_result = self._install_natively(request)
-        
-        if not installation_result.success:
-            raise RuntimeError(f"Installation failed: {installation_result.error_message}")
-        
-        # Create dependency set with installed files
-        dep_files = [
-            DependencyFile(file.relative_path, file.content)
-            for file in installation_result.files
-        ]
-        
-        dependency_set = DependencySet(
-            manager=request.manager,
-            files=dep_files,
-            **self._get_version_kwargs(request.manager, request.versions)
-        )
-        
-        # Store in cache using the request hash
-        self._store_dependency_set(dependency_set, request_hash)
+        # Only installs are limited; lookups never take a slot
+        with self._install_slots:
+            # Installed files are streamed from the workspace into the cache,
+            # so it must outlive both installation and storage
+            workspace_key = self._workspace_key(request, installation_method)
+            temp_dir = self._workspace_pool.acquire(workspace_key)
+            reusable = False
+            
+            try:
+                # Install dependencies
+                if installation_method == 'docker':
+                    installation_result = self._install_with_docker(request, temp_dir)
+                else:
+                    installation_result = self._install_natively(request, temp_dir)
+            
+                if not installation_result.success:
+                    raise RuntimeError(f"Installation failed: {installation_result.error_message}")
+            
+                # Create dependency set with installed files
+                dep_files = [
+                    DependencyFile(file.relative_path, file.content, file.source_path)
+                    for file in installation_result.files
+                ]
+            
+                dependency_set = DependencySet(
+                    manager=request.manager,
+                    files=dep_files,
+                    **self._get_version_kwargs(request.manager, request.versions)
+                )
+            
+                # Store in cache using the request hash
+                self._store_dependency_set(dependency_set, request_hash)
+                self._hit_cache.add(request_hash)
+                reusable = True
+            
+            finally:
+                if reusable:
+                    # Keep the installed output for the next install; drop the
+                    # request files so they can't leak into it
+                    self._clear_request_files(request, temp_dir)
+                    self._workspace_pool.release(workspace_key, temp_dir)
+                else:
+                    self._workspace_pool.discard(temp_dir)
         
         return CacheResponse(
             bundle_hash=request_hash,
@@ -84,21 +340,21 @@ class HandleCacheRequest:
         files = []
         
         # Get lockfile and manifest names
-        installer = self.installer_factory.create_installer(
-            request.manager, request.versions, request.custom_args
-        )
+        installer = self._get_installer(request)
         
         # Add lockfile only if present
-        if request.lockfile_content:
+        if request.lockfile_path is not None or request.lockfile_content:
             files.append(DependencyFile(
                 installer.lockfile_name,
-                request.lockfile_content
+                request.lockfile_content,
+                request.lockfile_path
             ))
         
         # Add manifest
         files.append(DependencyFile(
             installer.manifest_name,
-            request.manifest_content
+            request.manifest_content,
+            request.manifest_path
         ))
         
         # Create dependency set
@@ -109,87 +365,83 @@ class HandleCacheRequest:
         )
         
         return dep_set.calculate_bundle_hash()
-    
+
+    def _get_installer(self, request: CacheRequest) -> DependencyInstaller:
+        """Return the installer for the request, reusing one built for identical arguments."""
+        try:
+            key = (
+                request.manager,
+                tuple(sorted(request.versions.items())),
+                tuple(request.custom_args or ())
+            )
+            hash(key)
+        except TypeError:
+            # Unhashable version values - build without caching
+            return self.installer_factory.create_installer(
+                request.manager, request.versions, request.custom_args
+            )
+        
+        with self._installer_cache_lock:
+            installer = self._installer_cache.get(key)
+            if installer is None:
+                installer = self.installer_factory.create_installer(
+                    request.manager, request.versions, request.custom_args
+                )
+                if len(self._installer_cache) >= INSTALLER_CACHE_SIZE:
+                    # Evict the oldest entry (dicts keep insertion order)
+                    self._installer_cache.pop(next(iter(self._installer_cache)), None)
+                self._installer_cache[key] = installer
+        
+        return installer
+
+    def _is_cached(self, bundle_hash: str) -> bool:
+        """Check whether both the index and the bundle ZIP exist for a hash."""
+        if bundle_hash in self._hit_cache:
+            # Index already seen - only confirm the bundle ZIP is still there
+            if self.cache_repository.has_bundle(bundle_hash):
+                return True
+            # Bundle was removed (e.g. by cleanup) - fall back to a full check
+            self._hit_cache.discard(bundle_hash)
+        
+        cached = bool(self.cache_repository.get_index(bundle_hash)) and self.cache_repository.has_bundle(bundle_hash)
+        if cached:
+            self._hit_cache.add(bundle_hash)
+        return cached
+
+    @staticmethod
+    def _is_valid_hash(bundle_hash: Optional[str]) -> bool:
+        """Check that a client-supplied hash is a hex digest safe to use in cache paths."""
+        if not bundle_hash or len(bundle_hash) != HASH_HEX_LENGTH:
+            return False
+        return all(c in string.hexdigits for c in bundle_hash)
+
     def _get_version_kwargs(self, manager: str, versions: Dict[str, str]) -> Dict[str, str]:
         """Convert versions dict to kwargs for DependencySet."""
-        kwargs = {}
-        
-        if manager in ('npm', 'yarn'):
-            # Handle both API format (node/npm) and internal format (runtime/package_manager)
-            if 'node' in versions:
-                kwargs['node_version'] = versions['node']
-            elif 'runtime' in versions:
-                kwargs['node_version'] = versions['runtime']
-                
-            if 'npm' in versions:
-                kwargs['npm_version'] = versions['npm']
-            elif 'yarn' in versions:
-                kwargs['npm_version'] = versions['yarn']  # yarn also uses npm_version in DependencySet
-            elif 'package_manager' in versions:
-                kwargs['npm_version'] = versions['package_manager']
-        elif manager == 'composer':
-            if 'php' in versions:
-                kwargs['php_version'] = versions['php']
-            elif 'runtime' in versions:
-                kwargs['php_version'] = versions['runtime']
-        
-        return kwargs
+        try:
+            return dict(_version_kwargs(manager, tuple(sorted(versions.items()))))
+        except TypeError:
+            # Unhashable version values - bypass the cache
+            return dict(_version_kwargs.__wrapped__(manager, tuple(versions.items())))
     
     def _is_version_supported(self, manager: str, versions: Dict[str, str]) -> bool:
         """Check if the given versions are supported."""
-        if manager not in self.supported_versions:
-            # If no supported versions are configured for this manager, accept any version
-            return True
-        
-        supported_list = self.supported_versions[manager]
+        supported = self._supported_index.get(manager)
         
-        # If the list is empty, accept any version
-        if not supported_list:
+        # If no supported versions are configured for this manager, accept any version
+        if not supported:
             return True
         
-        # Convert request versions to the expected format
-        normalized_versions = {}
-        if manager in ('npm', 'yarn'):
-            # Map node -> runtime, npm/yarn -> package_manager
-            if 'node' in versions:
-                normalized_versions['runtime'] = versions['node']
-            elif 'runtime' in versions:
-                normalized_versions['runtime'] = versions['runtime']
-                
-            if 'npm' in versions:
-                normalized_versions['package_manager'] = versions['npm']
-            elif 'yarn' in versions:
-                normalized_versions['package_manager'] = versions['yarn']
-            elif 'package_manager' in versions:
-                normalized_versions['package_manager'] = versions['package_manager']
-        elif manager == 'composer':
-            # Map php -> runtime
-            if 'php' in versions:
-                normalized_versions['runtime'] = versions['php']
-            elif 'runtime' in versions:
-                normalized_versions['runtime'] = versions['runtime']
-        else:
-            # For other managers, use as-is
-            normalized_versions = versions
-        
-        # Now check against supported versions
-        for supported in supported_list:
-            # Check if all required fields are present and match
-            match = True
-            
-            # First check if all required fields from supported version are present
-            for key in supported.keys():
-                if key not in normalized_versions:
-                    match = False
-                    break
-                if supported[key] != normalized_versions.get(key):
-                    match = False
-                    break
-            
-            if match:
-                return True
-        
-        return False
+        try:
+            normalized = _normalize_versions(manager, tuple(sorted(versions.items())))
+        except TypeError:
+            # Unhashable version values can never match the configured version strings
+            return False
+        
+        # Exact match is the common case; otherwise every field required by
+        # a supported entry must be present with the same value
+        if normalized in supported:
+            return True
+        return any(entry <= normalized for entry in supported)
     
     def _determine_installation_method(self, manager: str, versions: Dict[str, str]) -> str:
         """Determine whether to use native or Docker installation."""
@@ -201,33 +453,19 @@ class HandleCacheRequest:
         
         raise ValueError(f"Unsupported {manager} version and Docker is not available")
     
-    def _install_natively(self, request: CacheRequest) -> InstallationResult:
-        """Install dependencies using native package manager."""
-        temp_dir = Path(tempfile.mkdtemp(prefix="dep_cache_"))
+    def _install_natively(self, request: CacheRequest, work_dir: Path) -> InstallationResult:
+        """Install dependencies into work_dir using native package manager."""
+        # Get installer
+        installer = self._get_installer(request)
         
-        try:
-            # Get installer
-            installer = self.installer_factory.create_installer(
-                request.manager, request.versions, request.custom_args
-            )
-            
-            # Write manifest
-            (temp_dir / installer.manifest_name).write_bytes(request.manifest_content)
-            
-            # Write lockfile only if it has content
-            if request.lockfile_content:
-                (temp_dir / installer.lockfile_name).write_bytes(request.lockfile_content)
-            
-            # Install
-            result = installer.install(str(temp_dir))
-            
-            return result
-            
-        finally:
-            shutil.rmtree(temp_dir, ignore_errors=True)
+        # Place manifest and lockfile in the workspace
+        self._stage_request_files(request, installer, work_dir)
+        
+        # Install
+        return installer.install(str(work_dir))
     
-    def _install_with_docker(self, request: CacheRequest) -> InstallationResult:
-        """Install dependencies using Docker."""
+    def _install_with_docker(self, request: CacheRequest, work_dir: Path) -> InstallationResult:
+        """Install dependencies using Docker, staging the request files in work_dir."""
         if not self.docker_utils:
             return InstallationResult(
                 success=False,
@@ -235,63 +473,72 @@ class HandleCacheRequest:
                 error_message="Docker utils not available"
             )
         
-        temp_dir = Path(tempfile.mkdtemp(prefix="dep_cache_"))
+        # Get installer for file names
+        installer = self._get_installer(request)
         
+        # Place manifest and lockfile in the workspace
+        self._stage_request_files(request, installer, work_dir)
+        
+        # Install with Docker
+        return self.docker_utils.install_with_docker(
+            str(work_dir),
+            request.manager,
+            request.versions,
+            request.custom_args
+        )
+    
+    def _clear_request_files(self, request: CacheRequest, work_dir: Path) -> None:
+        """Remove the manifest and lockfile (staged or generated) from work_dir."""
+        installer = self._get_installer(request)
+        for name in (installer.manifest_name, installer.lockfile_name):
+            (work_dir / name).unlink(missing_ok=True)
+    
+    @staticmethod
+    def _workspace_key(request: CacheRequest, installation_method: str) -> Optional[Hashable]:
+        """Return the workspace pool key for a request, or None if its install can't reuse output."""
+        # Docker installs run in their own directory, and only some managers keep
+        # the previous output - pooling anything else would just hold disk
+        has_lockfile = request.lockfile_path is not None or bool(request.lockfile_content)
+        if installation_method != 'native' or not has_lockfile or request.manager not in OUTPUT_REUSING_MANAGERS:
+            return None
+        
+        key = (request.manager, frozenset(request.versions.items()))
         try:
-            # Get installer for file names
-            installer = self.installer_factory.create_installer(
-                request.manager, request.versions, request.custom_args
-            )
-            
-            # Write manifest
-            (temp_dir / installer.manifest_name).write_bytes(request.manifest_content)
-            
-            # Write lockfile only if it has content
-            if request.lockfile_content:
-                (temp_dir / installer.lockfile_name).write_bytes(request.lockfile_content)
-            
-            # Install with Docker
-            return self.docker_utils.install_with_docker(
-                str(temp_dir),
-                request.manager,
-                request.versions,
-                request.custom_args
-            )
-            
-        finally:
-            shutil.rmtree(temp_dir, ignore_errors=True)
+            hash(key)
+        except TypeError:
+            # Unhashable version values - use a one-off workspace
+            return None
+        return key
     
-    def _collect_files(self, directory: Path) -> List[FileData]:
-        """Collect all files from a directory."""
-        files = []
-        
-        if not directory.exists():
-            return files
+    def _stage_request_files(self, request: CacheRequest, installer: DependencyInstaller, work_dir: Path) -> None:
+        """Place the manifest and, if present, the lockfile in work_dir."""
+        self._stage_file(request.manifest_path, request.manifest_content, work_dir / installer.manifest_name)
         
-        for root, _, filenames in os.walk(directory):
-            for filename in filenames:
-                file_path = Path(root) / filename
-                relative_path = str(file_path.relative_to(directory))
-                content = file_path.read_bytes()
-                files.append(FileData(relative_path, content))
-        
-        return files
+        # Write lockfile only if it has content
+        if request.lockfile_path is not None or request.lockfile_content:
+            self._stage_file(request.lockfile_path, request.lockfile_content, work_dir / installer.lockfile_name)
+    
+    @staticmethod
+    def _stage_file(source_path: Optional[Path], content: bytes, target: Path) -> None:
+        """Link an uploaded file on disk to target, or write its in-memory content."""
+        if source_path is not None:
+            try:
+                # The upload was already written and hashed - share its data instead of copying it
+                os.link(source_path, target)
+            except OSError:
+                # Different filesystem, links unsupported or target already present
+                shutil.copyfile(source_path, target)
+        else:
+            target.write_bytes(content)
     
     def _store_dependency_set(self, dependency_set: DependencySet, bundle_hash: str) -> None:
         """Store the dependency set in the cache repository using the provided bundle hash."""
-        import hashlib
-        from domain.hash_constants import HASH_ALGORITHM
+        files = dependency_set.files
         
-        # Store blobs and save index with the provided bundle hash
-        index_data = {}
-        for file in dependency_set.files:
-            # Calculate file hash
-            hasher = hashlib.new(HASH_ALGORITHM)
-            hasher.update(file.content)
-            file_hash = hasher.hexdigest()
-            
-            self.cache_repository.store_blob(file_hash, file.content)
-            index_data[file.relative_path] = file_hash
+        # Store blobs in parallel - each one is dominated by file I/O, which releases the GIL
+        with ThreadPoolExecutor(max_workers=BLOB_STORE_WORKERS) as executor:
+            file_hashes = executor.map(self._store_file_blob, files)
+            index_data = {file.relative_path: file_hash for file, file_hash in zip(files, file_hashes)}
         
         # Extract manager version info
         manager = dependency_set.manager
@@ -309,4 +556,22 @@ class HandleCacheRequest:
         self.cache_repository.save_index(bundle_hash, manager, manager_version, index_data)
         
         # Generate the bundle ZIP file
-        self.cache_repository.generate_bundle_zip(bundle_hash)
\ No newline at end of file
+        self.cache_repository.generate_bundle_zip(bundle_hash)
+    
+    def _store_file_blob(self, file: DependencyFile) -> str:
+        """Hash and store a single file blob from disk or memory, returning its hash."""
+        if file.source_path is not None:
+            # Stream from disk so installed files are never held in memory
+            file_hash = calculate_path_hash(file.source_path)
+        else:
+            hasher = hashlib.new(HASH_ALGORITHM)
+            hasher.update(file.content)
+            file_hash = hasher.hexdigest()
+        
+        # The repository skips blobs it already has, so existing files cost one stat
+        if file.source_path is not None:
+            self.cache_repository.store_blob_file(file_hash, file.source_path)
+        else:
+            self.cache_repository.store_blob(file_hash, file.content)
+        
+        return file_hash
@@ -2,6 +2,7 @@ import hashlib
 from pathlib import Path
 from typing import Optional
 from .hash_constants import HASH_ALGORITHM, BLOCK_SIZE
+from .dependency_set import calculate_path_hash
 
 
 class BlobStorage:
@@ -15,16 +16,9 @@ class BlobStorage:
     
     def compute_file_hash(self, file_path: Path) -> str:
         """
-        Calculates the SHA256 of a file's content in blocks.
+        Calculates the SHA256 of a file's content, streamed from disk.
         """
-        sha = hashlib.new(HASH_ALGORITHM)
-        with open(file_path, "rb") as f:
-            while True:
-                chunk = f.read(BLOCK_SIZE)
-                if not chunk:
-                    break
-                sha.update(chunk)
-        return sha.hexdigest()
+        return calculate_path_hash(file_path)
     
     def get_blob_path(self, file_hash: str) -> Path:
         """
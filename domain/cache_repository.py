@@ -97,10 +97,23 @@ class CacheRepository(ABC):
         """
         pass
     
+    @abstractmethod
+    def has_blob(self, blob_hash: str) -> bool:
+        """
+        Check if a file blob exists in the cache.
+        
+        Args:
+            blob_hash: The SHA256 hash of the file content
+            
+        Returns:
+            True if the blob exists, False otherwise
+        """
+        pass
+    
     @abstractmethod
     def store_blob(self, blob_hash: str, content: bytes) -> None:
         """
-        Store a file blob with its hash.
+        Store a file blob with its hash, if not already present.
         
         Args:
             blob_hash: The SHA256 hash of the file content
@@ -111,6 +124,21 @@ class CacheRepository(ABC):
         """
         pass
     
+    @abstractmethod
+    def store_blob_file(self, blob_hash: str, source_path: Path) -> None:
+        """
+        Store a file blob by copying it from disk, without loading it into memory,
+        if not already present.
+        
+        Args:
+            blob_hash: The SHA256 hash of the file content
+            source_path: Path of the file to copy into the cache
+            
+        Raises:
+            IOError: If storage fails
+        """
+        pass
+    
     @abstractmethod
     def save_blob(self, file_hash: str, content: bytes) -> None:
         """
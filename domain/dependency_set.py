@@ -1,16 +1,35 @@
 """Domain model for dependency sets and bundle hash calculation."""
 
 import hashlib
+import sys
+from pathlib import Path
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass, field
-from .hash_constants import HASH_ALGORITHM, BLOCK_SIZE
+from .hash_constants import HASH_ALGORITHM, BLOCK_SIZE, STREAM_CHUNK_SIZE
 
+# Per-file records are created once per installed file; slots keep them
+# small and attribute access fast where dataclasses support it (Python 3.10+)
+_DATACLASS_SLOTS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(**_DATACLASS_SLOTS)
 class DependencyFile:
-    """Represents a single file in a dependency set."""
+    """
+    Represents a single file in a dependency set.
+    
+    The content is either held in memory or, when source_path is set,
+    streamed from disk on demand.
+    """
     relative_path: str
-    content: bytes
+    content: Optional[bytes] = None
+    source_path: Optional[Path] = None
+    
+    def update_hash(self, hasher: Any) -> None:
+        """Feed the file content into an existing hash object."""
+        if self.source_path is not None:
+            _update_hash_from_path(hasher, self.source_path)
+        else:
+            hasher.update(self.content or b"")
 
 
 @dataclass
@@ -57,10 +76,8 @@ class DependencySet:
             hasher.update(file.relative_path.encode('utf-8'))
             hasher.update(b'\x00')
             
-            # Hash file content in blocks
-            for i in range(0, len(file.content), BLOCK_SIZE):
-                block = file.content[i:i + BLOCK_SIZE]
-                hasher.update(block)
+            # Hash file content (streamed from disk for path-backed files)
+            file.update_hash(hasher)
             
             hasher.update(b'\x00')
         
@@ -72,7 +89,7 @@ class DependencySet:
         
         for file in self.files:
             hasher = hashlib.new(HASH_ALGORITHM)
-            hasher.update(file.content)
+            file.update_hash(hasher)
             file_hashes[file.relative_path] = hasher.hexdigest()
         
         return file_hashes
@@ -94,4 +111,30 @@ def calculate_file_hash(file_content: bytes) -> str:
     for i in range(0, len(file_content), BLOCK_SIZE):
         hasher.update(file_content[i:i + BLOCK_SIZE])
     
-    return hasher.hexdigest()
\ No newline at end of file
+    return hasher.hexdigest()
+
+
+def calculate_path_hash(file_path: Path) -> str:
+    """
+    Calculate the hash of a file on disk without loading it into memory.
+    
+    Args:
+        file_path: Path of the file to hash
+        
+    Returns:
+        The hexadecimal hash string
+    """
+    hasher = hashlib.new(HASH_ALGORITHM)
+    _update_hash_from_path(hasher, file_path)
+    return hasher.hexdigest()
+
+
+def _update_hash_from_path(hasher: Any, file_path: Path) -> None:
+    """Stream a file into hasher, using hashlib.file_digest where available (Python 3.11+)."""
+    with open(file_path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):
+            # file_digest reads into a reusable buffer and updates the given hash object
+            hashlib.file_digest(f, lambda: hasher)
+        else:
+            while chunk := f.read(STREAM_CHUNK_SIZE):
+                hasher.update(chunk)
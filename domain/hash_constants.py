@@ -2,4 +2,6 @@
 
 HASH_ALGORITHM = "sha256"
 BLOCK_SIZE = 8192  # 8KB block size for file processing
+STREAM_CHUNK_SIZE = 1024 * 1024  # 1MB chunks when streaming installed files into the cache
+HASH_HEX_LENGTH = 64  # Length of a SHA256 hex digest (e.g., bundle hashes sent by clients)
 HASH_PREFIX_LENGTH = 2  # Use first 2 characters for directory structure (e.g., aa/bb/aabb1234...)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 import subprocess
 import os
 import sys
@@ -10,6 +10,22 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from application.dtos import InstallationResult, FileData
 
 
+def iter_files(directory: Path, prefix: str = "") -> Iterator[Tuple[str, Path]]:
+    """
+    Recursively yield (relative_path, full_path) for every regular file in directory.
+    
+    Uses os.scandir so directory entries are typed without an extra stat per file.
+    Symlinks to files are followed; symlinked directories and broken links are skipped.
+    """
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            relative_path = os.path.join(prefix, entry.name)
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_files(Path(entry.path), relative_path)
+            elif entry.is_file():
+                yield relative_path, Path(entry.path)
+
+
 class DependencyInstaller(ABC):
     """Abstract base class for dependency installers."""
     
@@ -41,20 +57,14 @@ class DependencyInstaller(ABC):
         pass
     
     def _collect_files(self, directory: Path) -> List[FileData]:
-        """Collect all files from a directory."""
-        files = []
-        
+        """Collect all files from a directory as references to their paths on disk."""
         if not directory.exists():
-            return files
+            return []
         
-        for root, _, filenames in os.walk(directory):
-            for filename in filenames:
-                file_path = Path(root) / filename
-                relative_path = str(file_path.relative_to(directory))
-                content = file_path.read_bytes()
-                files.append(FileData(relative_path, content))
-        
-        return files
+        return [
+            FileData(relative_path, source_path=file_path)
+            for relative_path, file_path in iter_files(directory)
+        ]
 
 
 class NpmInstaller(DependencyInstaller):
@@ -107,8 +117,7 @@ class NpmInstaller(DependencyInstaller):
         # If npm install was used (lockfile didn't exist), check if one was generated
         if not lockfile_existed:
             if lockfile_path.exists():
-                lockfile_content = lockfile_path.read_bytes()
-                files.append(FileData(self.lockfile_name, lockfile_content))
+                files.append(FileData(self.lockfile_name, source_path=lockfile_path))
         
         return InstallationResult(
             success=True,
@@ -1,9 +1,12 @@
 """ZIP utility for creating ZIP files from blob storage."""
+import shutil
+import time
 import zipfile
 from pathlib import Path
 from typing import Dict
 
 from .blob_storage import BlobStorage
+from .hash_constants import STREAM_CHUNK_SIZE
 
 
 class ZipUtil:
@@ -17,8 +20,8 @@ class ZipUtil:
     ) -> None:
         """
         Creates a ZIP at zip_path. For each (relative_path, file_hash)
-        in index_data, read the blob via blob_storage.read_blob(file_hash)
-        and add it to the ZIP with arcname=relative_path.
+        in index_data, stream the blob at blob_storage.get_blob_path(file_hash)
+        into the ZIP with arcname=relative_path.
         
         Args:
             zip_path: Path where the ZIP file should be created
@@ -31,8 +34,17 @@ class ZipUtil:
         """
         zip_path.parent.mkdir(parents=True, exist_ok=True)
         
+        date_time = time.localtime(time.time())[:6]
+        
         with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
             for rel_path, file_hash in index_data.items():
-                blob_bytes = blob_storage.read_blob(file_hash)
-                # To add bytes, use writestr
-                zf.writestr(rel_path, blob_bytes)
\ No newline at end of file
+                # Same entry metadata writestr() would use, without loading the blob into memory
+                info = zipfile.ZipInfo(rel_path, date_time=date_time)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.external_attr = 0o600 << 16
+                blob_path = blob_storage.get_blob_path(file_hash)
+                # Streamed entries need their size up front to get ZIP64 headers past 2 GiB
+                info.file_size = blob_path.stat().st_size
+                
+                with open(blob_path, "rb") as src, zf.open(info, "w") as dst:
+                    shutil.copyfileobj(src, dst, STREAM_CHUNK_SIZE)
\ No newline at end of file
@@ -1,5 +1,4 @@
 import subprocess
-import json
 import logging
 from typing import Dict, Optional, List, Tuple
 import tempfile
@@ -11,6 +10,7 @@ from pathlib import Path
 # Add the project root to the Python path to enable imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from application.dtos import InstallationResult, FileData
+from domain.installer import iter_files
 
 logger = logging.getLogger(__name__)
 
@@ -208,17 +208,12 @@ class DockerUtils:
             if not os.path.exists(dir_path):
                 continue
                 
-            for root, _, filenames in os.walk(dir_path):
-                for filename in filenames:
-                    file_path = os.path.join(root, filename)
-                    rel_path = os.path.relpath(file_path, directory)
-                    
-                    try:
-                        with open(file_path, 'rb') as f:
-                            content = f.read()
-                        files.append((rel_path, content))
-                    except Exception as e:
-                        logger.warning(f"Failed to read file {file_path}: {e}")
+            # The container workspace is removed after installation, so content is read here
+            for rel_path, file_path in iter_files(Path(dir_path), install_dir):
+                try:
+                    files.append((rel_path, file_path.read_bytes()))
+                except Exception as e:
+                    logger.warning(f"Failed to read file {file_path}: {e}")
                         
         return files
     
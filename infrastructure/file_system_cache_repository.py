@@ -1,11 +1,11 @@
 import os
 import json
 import shutil
-import zipfile
 import hashlib
 from pathlib import Path
-from typing import Dict, Optional, List, Tuple, Any
+from typing import Callable, Dict, Optional, Any
 import threading
+import uuid
 from domain.cache_repository import CacheRepository
 from domain.blob_storage import BlobStorage
 from domain.dependency_set import DependencySet
@@ -35,8 +35,12 @@ class FileSystemCacheRepository(CacheRepository):
             index_data = {}
             
             for file in dependency_set.files:
-                file_hash = self._calculate_hash(file.content)
-                self.store_blob(file_hash, file.content)
+                if file.source_path is not None:
+                    file_hash = self.blob_storage.compute_file_hash(file.source_path)
+                    self.store_blob_file(file_hash, file.source_path)
+                else:
+                    file_hash = self._calculate_hash(file.content)
+                    self.store_blob(file_hash, file.content)
                 index_data[file.relative_path] = file_hash
             
             # Extract manager and version info from dependency_set
@@ -124,13 +128,43 @@ class FileSystemCacheRepository(CacheRepository):
         # Fall back to blob storage
         return self.blob_storage.get_blob(blob_hash)
     
+    def has_blob(self, blob_hash: str) -> bool:
+        """Check if a file blob exists in the cache."""
+        return self._get_blob_path(blob_hash).exists()
+    
     def store_blob(self, blob_hash: str, content: bytes) -> None:
         """Store a file blob with its hash."""
         # For compatibility with tests that expect to store with a specific hash
-        blob_path = self._get_blob_path(blob_hash)
-        if not blob_path.exists():
-            blob_path.parent.mkdir(parents=True, exist_ok=True)
-            blob_path.write_bytes(content)
+        if not self.has_blob(blob_hash):
+            self._write_atomically(
+                self._get_blob_path(blob_hash),
+                lambda tmp_path: tmp_path.write_bytes(content)
+            )
+    
+    def store_blob_file(self, blob_hash: str, source_path: Path) -> None:
+        """Store a file blob by copying it from disk (sendfile where available)."""
+        if not self.has_blob(blob_hash):
+            self._write_atomically(
+                self._get_blob_path(blob_hash),
+                lambda tmp_path: shutil.copyfile(source_path, tmp_path)
+            )
+    
+    def _write_atomically(self, target_path: Path, write: Callable[[Path], Any]) -> None:
+        """
+        Write a blob or bundle to a unique temporary file and rename it into place.
+        
+        Blobs may be stored from several threads at once, so readers must
+        never see a partially written file and concurrent writers of the
+        same hash must not interleave.
+        """
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target_path.with_name(f".{target_path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, target_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
     
     def save_blob(self, file_hash: str, content: bytes) -> None:
         """Alias for store_blob() to maintain compatibility."""
@@ -145,11 +179,16 @@ class FileSystemCacheRepository(CacheRepository):
             
             bundle_path = self._get_bundle_path(bundle_hash)
             
+            # Bundles are content-addressed - an existing ZIP is already up to date
+            if bundle_path.exists():
+                return bundle_path
+            
             try:
-                bundle_path.parent.mkdir(parents=True, exist_ok=True)
-                
-                # Use ZipUtil to create ZIP from blobs
-                self.zip_util.create_zip_from_blobs(bundle_path, index_data, self.blob_storage)
+                # Use ZipUtil to create ZIP from blobs; only a finished ZIP becomes visible
+                self._write_atomically(
+                    bundle_path,
+                    lambda tmp_path: self.zip_util.create_zip_from_blobs(tmp_path, index_data, self.blob_storage)
+                )
                 
                 return bundle_path
             except (OSError, PermissionError):
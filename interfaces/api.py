@@ -1,23 +1,48 @@
-from typing import Optional, List, Dict
+from typing import Dict, Optional, List, Tuple
+import asyncio
 import os
-import io
-import json
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from contextlib import asynccontextmanager
+from dataclasses import replace
 
-from fastapi import FastAPI, HTTPException, Depends, Header, Response, File, UploadFile, Form
+import orjson
+
+from fastapi import FastAPI, HTTPException, Depends, Header, File, UploadFile, Form
+from fastapi.concurrency import run_in_threadpool
 from typing import List as TypingList
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from pydantic import BaseModel, Field
 
 from application.dtos import CacheRequest, CacheResponse
-from application.handle_cache_request import HandleCacheRequest
+from application.handle_cache_request import HandleCacheRequest, WorkspacePool, MAX_CONCURRENT_INSTALLS
 from infrastructure.api_key_validator import ApiKeyValidator
 from infrastructure.file_system_cache_repository import FileSystemCacheRepository
 from infrastructure.docker_utils import DockerUtils
 from domain.installer import InstallerFactory
 
 
+# Chunk size used when streaming uploaded files to disk
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+SUPPORTED_MANAGERS = frozenset({"npm", "composer", "yarn"})
+
+# Expected upload filenames per manager
+MANIFEST_NAMES = {
+    "npm": "package.json",
+    "yarn": "package.json",
+    "composer": "composer.json"
+}
+LOCKFILE_NAMES = {
+    "npm": "package-lock.json",
+    "yarn": "yarn.lock",
+    "composer": "composer.lock"
+}
+
+
 class Config:
     def __init__(
         self,
@@ -26,7 +51,8 @@ class Config:
         use_docker_on_version_mismatch: bool = False,
         is_public: bool = False,
         api_keys: Optional[List[str]] = None,
-        base_url: str = "http://localhost:8000"
+        base_url: str = "http://localhost:8000",
+        max_concurrent_installs: int = MAX_CONCURRENT_INSTALLS
     ):
         self.cache_dir = cache_dir
         self.supported_versions = supported_versions
@@ -34,6 +60,7 @@ class Config:
         self.is_public = is_public
         self.api_keys = api_keys or []
         self.base_url = base_url.rstrip('/')
+        self.max_concurrent_installs = max_concurrent_installs
 
 
 class CacheResponseDTO(BaseModel):
@@ -46,25 +73,49 @@ config: Optional[Config] = None
 cache_repository: Optional[FileSystemCacheRepository] = None
 api_key_validator: Optional[ApiKeyValidator] = None
 docker_utils: Optional[DockerUtils] = None
+handler: Optional[HandleCacheRequest] = None
+# Installs run here, so queued installs never hold the threads that serve cache hits
+install_executor: Optional[ThreadPoolExecutor] = None
+# Installs in progress by bundle hash; identical misses await the same one
+inflight_installs: Dict[str, "asyncio.Future[CacheResponse]"] = {}
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    global cache_repository, docker_utils
+    global cache_repository, docker_utils, handler, install_executor
     if config:
         cache_repository = FileSystemCacheRepository(Path(config.cache_dir))
         docker_utils = DockerUtils()
+        # One handler serves every request; it precomputes the supported
+        # versions index and shares the install limit, hit cache and workspaces
+        handler = HandleCacheRequest(
+            cache_repository=cache_repository,
+            installer_factory=InstallerFactory(),
+            docker_utils=docker_utils,
+            supported_versions=config.supported_versions,
+            use_docker_on_version_mismatch=config.use_docker_on_version_mismatch,
+            install_slots=threading.BoundedSemaphore(config.max_concurrent_installs),
+            workspace_pool=WorkspacePool(max_idle_per_key=config.max_concurrent_installs)
+        )
+        install_executor = ThreadPoolExecutor(
+            max_workers=config.max_concurrent_installs,
+            thread_name_prefix="dep_cache_install"
+        )
     yield
     # Shutdown
-    pass
+    if install_executor:
+        install_executor.shutdown(wait=True)
+    if handler:
+        handler.close()
 
 
 app = FastAPI(
     title="DepCacheProxy Server",
     description="Dependency caching proxy server",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 
@@ -109,27 +160,27 @@ async def cache_dependencies(
     - file: Array of files (manifest and optionally lockfile)
     - custom_args: Optional JSON array of custom arguments for the package manager
     """
-    if not config or not cache_repository:
+    if not config or not cache_repository or not handler or not install_executor:
         raise HTTPException(status_code=500, detail="Server not properly configured")
     
     # Parse versions JSON
     try:
-        versions_dict = json.loads(versions)
-    except json.JSONDecodeError:
+        versions_dict = orjson.loads(versions)
+    except orjson.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid versions JSON")
     
     # Parse custom arguments if provided
     custom_args_list = None
     if custom_args:
         try:
-            custom_args_list = json.loads(custom_args)
+            custom_args_list = orjson.loads(custom_args)
             if not isinstance(custom_args_list, list):
                 raise ValueError("custom_args must be a JSON array")
-        except (json.JSONDecodeError, ValueError) as e:
+        except (orjson.JSONDecodeError, ValueError) as e:
             raise HTTPException(status_code=400, detail=f"Invalid custom_args: {str(e)}")
     
     # Validate manager
-    if manager not in ["npm", "composer", "yarn"]:
+    if manager not in SUPPORTED_MANAGERS:
         raise HTTPException(status_code=400, detail=f"Unsupported manager: {manager}")
     
     # Validate we have at least one file
@@ -137,85 +188,139 @@ async def cache_dependencies(
         raise HTTPException(status_code=400, detail="No files provided")
     
     # Determine expected filenames based on manager
-    manifest_names = {
-        "npm": "package.json",
-        "yarn": "package.json", 
-        "composer": "composer.json"
-    }
-    lockfile_names = {
-        "npm": "package-lock.json",
-        "yarn": "yarn.lock",
-        "composer": "composer.lock"
-    }
-    
-    manifest_name = manifest_names.get(manager)
-    lockfile_name = lockfile_names.get(manager)
+    manifest_name = MANIFEST_NAMES[manager]
+    lockfile_name = LOCKFILE_NAMES[manager]
     
-    # Read file contents and identify manifest/lockfile
-    manifest_content = None
-    lockfile_content = None
-    
-    try:
-        for uploaded_file in file:
-            filename = uploaded_file.filename.lower()
-            content = await uploaded_file.read()
-            
-            if filename == manifest_name:
-                manifest_content = content
-            elif filename == lockfile_name:
-                lockfile_content = content
-            else:
-                # For flexibility, also check if filename contains expected patterns
-                if manifest_name and manifest_name in filename:
-                    manifest_content = content
-                elif lockfile_name and lockfile_name in filename:
-                    lockfile_content = content
+    # Stream uploads to disk instead of reading them into memory; the
+    # directory must outlive the lookup, which reads the files from it
+    with tempfile.TemporaryDirectory(prefix="dep_cache_upload_") as upload_dir:
+        manifest_path: Optional[Path] = Path(upload_dir) / manifest_name
+        lockfile_path: Optional[Path] = Path(upload_dir) / lockfile_name
         
-        # Manifest is always required
-        if not manifest_content:
-            raise ValueError(f"Missing required manifest file: {manifest_name}")
+        try:
+            for uploaded_file in file:
+                target = _match_upload(uploaded_file.filename, manifest_path, lockfile_path)
+                if target is None:
+                    continue
+                
+                await run_in_threadpool(_save_upload, uploaded_file, target)
             
-        # For npm, if lockfile is missing, we'll need to run npm install
-        # For composer, lockfile is always optional
-        if not lockfile_content:
-            # This will be handled by the installer
-            lockfile_content = b''  # Empty content signals missing lockfile
+            # Manifest is always required
+            if not _has_content(manifest_path):
+                raise ValueError(f"Missing required manifest file: {manifest_name}")
+                
+            # For npm, if lockfile is missing, we'll need to run npm install
+            # For composer, lockfile is always optional
+            if not _has_content(lockfile_path):
+                # This will be handled by the installer
+                lockfile_path = None
+                
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Error reading files: {str(e)}")
+        
+        # Convert to application DTO
+        cache_request = CacheRequest(
+            manager=manager,
+            versions=versions_dict,
+            custom_args=custom_args_list,
+            client_hash=hash,
+            manifest_path=manifest_path,
+            lockfile_path=lockfile_path
+        )
+        
+        try:
+            # Cache lookups hash files, so they run in the threadpool; installs
+            # run on install_executor so a backlog of misses can't delay hits
+            response, request_hash = await run_in_threadpool(handler.lookup, cache_request)
+            if response is None:
+                response = await _install(cache_request, request_hash)
             
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error reading files: {str(e)}")
-    
-    # Create request handler
-    handler = HandleCacheRequest(
-        cache_repository=cache_repository,
-        installer_factory=InstallerFactory(),
-        docker_utils=docker_utils,
-        supported_versions=config.supported_versions,
-        use_docker_on_version_mismatch=config.use_docker_on_version_mismatch
-    )
-    
-    # Convert to application DTO
-    cache_request = CacheRequest(
-        manager=manager,
-        versions=versions_dict,
-        lockfile_content=lockfile_content,
-        manifest_content=manifest_content,
-        custom_args=custom_args_list
-    )
+            # Convert response to match API spec
+            return CacheResponseDTO(
+                download_url=f"{config.base_url}{response.download_url}",
+                cache_hit=response.is_cache_hit
+            )
+        
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+async def _install(cache_request: CacheRequest, request_hash: str) -> CacheResponse:
+    """Install a missed request on install_executor, sharing the install with identical requests."""
+    inflight = inflight_installs.get(request_hash)
+    if inflight is None:
+        # The install outlives this request if it is cancelled, and the request's
+        # upload directory doesn't, so the install gets its own links to the uploads
+        install_request, install_dir = _detach_uploads(cache_request)
+        loop = asyncio.get_running_loop()
+        inflight = loop.run_in_executor(install_executor, handler.install, install_request, request_hash)
+        inflight_installs[request_hash] = inflight
+        inflight.add_done_callback(lambda done: _forget_install(request_hash, done))
+        inflight.add_done_callback(lambda done: shutil.rmtree(install_dir, ignore_errors=True))
     
+    # Waiters hold no thread; shield so a cancelled request doesn't cancel the install for the rest
+    return await asyncio.shield(inflight)
+
+
+def _forget_install(request_hash: str, done: "asyncio.Future[CacheResponse]") -> None:
+    """Drop a finished install so the next miss for its hash starts a new one."""
+    if inflight_installs.get(request_hash) is done:
+        del inflight_installs[request_hash]
+
+
+def _detach_uploads(cache_request: CacheRequest) -> Tuple[CacheRequest, Path]:
+    """Link a request's uploads into a new directory owned by its install."""
+    install_dir = Path(tempfile.mkdtemp(prefix="dep_cache_install_"))
+    detached = {}
     try:
-        # Handle the request
-        response = handler.handle(cache_request)
-        
-        # Convert response to match API spec
-        return CacheResponseDTO(
-            download_url=f"{config.base_url}{response.download_url}",
-            cache_hit=response.is_cache_hit
-        )
+        for field in ("manifest_path", "lockfile_path"):
+            source = getattr(cache_request, field)
+            if source is None:
+                continue
+            target = install_dir / source.name
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copyfile(source, target)
+            detached[field] = target
+    except BaseException:
+        shutil.rmtree(install_dir, ignore_errors=True)
+        raise
+    return replace(cache_request, **detached), install_dir
+
+
+def _match_upload(filename: str, manifest_path: Path, lockfile_path: Path) -> Optional[Path]:
+    """Return where an uploaded file should be saved, or None if it is neither manifest nor lockfile."""
+    # Exact names are the common case and need no normalisation
+    if filename == manifest_path.name:
+        return manifest_path
+    if filename == lockfile_path.name:
+        return lockfile_path
     
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    filename = filename.lower()
+    if filename == manifest_path.name:
+        return manifest_path
+    if filename == lockfile_path.name:
+        return lockfile_path
+    # For flexibility, also check if filename contains expected patterns
+    if manifest_path.name in filename:
+        return manifest_path
+    if lockfile_path.name in filename:
+        return lockfile_path
+    return None
+
+
+def _save_upload(uploaded_file: UploadFile, target: Path) -> None:
+    """Copy an uploaded file to target in chunks, without loading it into memory."""
+    with open(target, "wb") as out:
+        shutil.copyfileobj(uploaded_file.file, out, UPLOAD_CHUNK_SIZE)
+
+
+def _has_content(path: Path) -> bool:
+    """Check whether an uploaded file was saved and is not empty."""
+    return path.exists() and path.stat().st_size > 0
 
 
 @app.get("/download/{bundle_hash}.zip", dependencies=[Depends(validate_api_key)])
@@ -223,7 +328,7 @@ async def download_bundle(bundle_hash: str):
     """
     Download a cached bundle as a ZIP file.
     
-    This endpoint retrieves a previously cached bundle and streams it as a ZIP file.
+    This endpoint retrieves a previously cached bundle and serves it as a ZIP file.
     """
     if not cache_repository:
         raise HTTPException(status_code=500, detail="Server not properly configured")
@@ -235,14 +340,9 @@ async def download_bundle(bundle_hash: str):
         if not zip_path or not zip_path.exists():
             raise HTTPException(status_code=404, detail="Bundle not found")
         
-        # Stream the file
-        def iterfile():
-            with open(zip_path, 'rb') as f:
-                while chunk := f.read(8192):
-                    yield chunk
-        
-        return StreamingResponse(
-            iterfile(),
+        # Let the server send the file directly instead of chunking it through a generator
+        return FileResponse(
+            zip_path,
             media_type="application/zip",
             headers={
                 "Content-Disposition": f"attachment; filename={bundle_hash}.zip"
@@ -267,7 +367,8 @@ def initialize_app(
     use_docker_on_version_mismatch: bool = False,
     is_public: bool = False,
     api_keys: Optional[List[str]] = None,
-    base_url: str = "http://localhost:8000"
+    base_url: str = "http://localhost:8000",
+    max_concurrent_installs: int = MAX_CONCURRENT_INSTALLS
 ):
     """Initialize the FastAPI application with configuration."""
     global config, api_key_validator
@@ -278,7 +379,8 @@ def initialize_app(
         use_docker_on_version_mismatch=use_docker_on_version_mismatch,
         is_public=is_public,
         api_keys=api_keys,
-        base_url=base_url
+        base_url=base_url,
+        max_concurrent_installs=max_concurrent_installs
     )
     
     # Initialize API key validator
@@ -10,13 +10,15 @@ Usage:
         [--use-docker-on-version-mismatch] \
         [--is_public] \
         [--api-keys=<KEY1>,<KEY2>,...] \
-        [--base-url=<BASE_URL>]
+        [--base-url=<BASE_URL>] \
+        [--max-concurrent-installs=<N>] \
+        [--timeout-keep-alive=<SECONDS>]
 """
 
 import argparse
 import sys
 import uvicorn
-from typing import Dict, List, Optional
+from typing import Dict, List
 
 from interfaces.api import initialize_app
 
@@ -44,6 +46,17 @@ def parse_supported_versions(version_string: str) -> List[Dict[str, str]]:
     return versions
 
 
+def positive_int(value: str) -> int:
+    """argparse type for options that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='DepCacheProxy Server - Dependency caching proxy',
@@ -76,6 +89,10 @@ def main():
                        help='Base URL for download links (default: http://localhost:8000)')
     parser.add_argument('--host', default='0.0.0.0',
                        help='Host to bind to (default: 0.0.0.0)')
+    parser.add_argument('--max-concurrent-installs', type=positive_int, default=4,
+                       help='Maximum number of package installations run at the same time (default: 4)')
+    parser.add_argument('--timeout-keep-alive', type=int, default=5,
+                       help='Seconds to keep idle HTTP connections open for reuse (default: 5)')
     
     args = parser.parse_args()
     
@@ -119,7 +136,8 @@ def main():
         use_docker_on_version_mismatch=args.use_docker_on_version_mismatch,
         is_public=args.is_public,
         api_keys=api_keys,
-        base_url=base_url
+        base_url=base_url,
+        max_concurrent_installs=args.max_concurrent_installs
     )
     
     # Run the server
@@ -128,7 +146,15 @@ def main():
     print(f"Public mode: {args.is_public}")
     print(f"Docker fallback: {args.use_docker_on_version_mismatch}")
     
-    uvicorn.run(app, host=args.host, port=args.port)
+    # "auto" selects uvloop and httptools when installed (uvicorn[standard])
+    uvicorn.run(
+        app,
+        host=args.host,
+        port=args.port,
+        loop="auto",
+        http="auto",
+        timeout_keep_alive=args.timeout_keep_alive
+    )
 
 
 if __name__ == '__main__':
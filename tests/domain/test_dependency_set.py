@@ -1,7 +1,8 @@
 """Unit tests for dependency set and hash calculation."""
 
+import sys
 import pytest
-from domain.dependency_set import DependencySet, DependencyFile, calculate_file_hash
+from domain.dependency_set import DependencySet, DependencyFile, calculate_file_hash, calculate_path_hash
 
 
 class TestDependencySet:
@@ -30,6 +31,26 @@ class TestDependencySet:
         
         assert dep_set1.calculate_bundle_hash() == dep_set2.calculate_bundle_hash()
     
+    def test_calculate_bundle_hash_streams_source_path(self, tmp_path):
+        """Test that files backed by a path hash the same as in-memory files."""
+        content = b"x" * 20000  # Spans several blocks
+        source = tmp_path / "index.js"
+        source.write_bytes(content)
+        
+        in_memory = DependencySet(
+            manager="npm",
+            files=[DependencyFile("lib/index.js", content)],
+            node_version="18.0.0"
+        )
+        on_disk = DependencySet(
+            manager="npm",
+            files=[DependencyFile("lib/index.js", source_path=source)],
+            node_version="18.0.0"
+        )
+        
+        assert on_disk.calculate_bundle_hash() == in_memory.calculate_bundle_hash()
+        assert on_disk.get_file_hashes() == in_memory.get_file_hashes()
+    
     def test_calculate_bundle_hash_different_manager(self):
         """Test that different managers produce different hashes."""
         files = [DependencyFile("composer.json", b'{"require": {}}')]
@@ -146,6 +167,24 @@ class TestFileHash:
         content = b"a" * 10000  # 10KB
         hash_value = calculate_file_hash(content)
         assert len(hash_value) == 64  # SHA256 produces 64 hex characters
+    
+    def test_calculate_path_hash_matches_content_hash(self, tmp_path):
+        """Test that hashing a file on disk matches hashing its content."""
+        content = b"b" * 300000  # Larger than the file_digest buffer
+        path = tmp_path / "blob"
+        path.write_bytes(content)
+        
+        assert calculate_path_hash(path) == calculate_file_hash(content)
+    
+    def test_calculate_path_hash_without_file_digest(self, tmp_path, monkeypatch):
+        """Test the chunked fallback used before Python 3.11."""
+        import hashlib
+        content = b"c" * 300000
+        path = tmp_path / "blob"
+        path.write_bytes(content)
+        monkeypatch.delattr(hashlib, "file_digest", raising=False)
+        
+        assert calculate_path_hash(path) == calculate_file_hash(content)
 
 
 class TestDependencySetEdgeCases:
@@ -302,4 +341,14 @@ class TestDependencySetEdgeCases:
         
         assert bundle_hash1 != bundle_hash2
         assert len(bundle_hash1) == 64
-        assert len(bundle_hash2) == 64
\ No newline at end of file
+        assert len(bundle_hash2) == 64
+    
+    @pytest.mark.skipif(sys.version_info < (3, 10), reason="dataclass slots need Python 3.10+")
+    def test_dependency_file_uses_slots(self):
+        """Per-file records carry no instance __dict__."""
+        from application.dtos import FileData
+        
+        for record in (DependencyFile("a.txt", b"a"), FileData("a.txt", b"a")):
+            assert not hasattr(record, "__dict__")
+            with pytest.raises(AttributeError):
+                record.extra = True
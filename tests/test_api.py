@@ -1,14 +1,24 @@
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import patch, MagicMock
 import tempfile
 import os
 import json
+import shutil
 import base64
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
+from pathlib import Path
 
-from interfaces.api import app, initialize_app, Config
-from application.dtos import CacheResponse, InstallationResult, FileData
+from fastapi.concurrency import run_in_threadpool
+
+import interfaces.api as api
+from interfaces.api import app, initialize_app, Config, _match_upload
+from application.dtos import CacheRequest, CacheResponse, InstallationResult, FileData
+from application.handle_cache_request import HandleCacheRequest
 
 
 class TestAPI:
@@ -52,17 +62,15 @@ class TestAPI:
         assert response.status_code == 200
         assert response.json() == {"status": "healthy"}
     
-    @patch('interfaces.api.HandleCacheRequest')
-    def test_cache_dependencies_success(self, mock_handler_class, client):
+    @patch('interfaces.api.handler')
+    def test_cache_dependencies_success(self, mock_handler, client):
         """Test successful cache request."""
         # Arrange
-        mock_handler = Mock()
-        mock_handler.handle.return_value = CacheResponse(
+        mock_handler.lookup.return_value = (CacheResponse(
             bundle_hash='abc123',
             download_url='/download/abc123.zip',
             is_cache_hit=True
-        )
-        mock_handler_class.return_value = mock_handler
+        ), 'abc123')
         
         # Create multipart form data with file[] array
         files = [
@@ -84,6 +92,103 @@ class TestAPI:
         assert response_data['download_url'] == 'http://localhost:8000/download/abc123.zip'
         assert response_data['cache_hit'] is True
     
+    @patch('interfaces.api.handler')
+    def test_cache_dependencies_runs_handler_off_event_loop(self, mock_handler, client):
+        """Test that lookups run in the threadpool and installs on the install executor."""
+        install_threads = []
+        
+        def install(request, request_hash):
+            install_threads.append(threading.current_thread().name)
+            return CacheResponse(
+                bundle_hash=request_hash,
+                download_url=f'/download/{request_hash}.zip',
+                is_cache_hit=False
+            )
+        
+        mock_handler.lookup.return_value = (None, 'abc123')
+        mock_handler.install.side_effect = install
+        
+        files = [
+            ('file', ('package.json', BytesIO(b'manifest content'), 'application/json'))
+        ]
+        data = {
+            'manager': 'npm',
+            'hash': 'abc123',
+            'versions': json.dumps({'node': '14.17.0', 'npm': '6.14.13'})
+        }
+        
+        with patch('interfaces.api.run_in_threadpool', wraps=run_in_threadpool) as mock_run:
+            response = client.post("/v1/cache", data=data, files=files)
+        
+        assert response.status_code == 200
+        # Uploads are saved off the loop too; the lookup runs last
+        assert mock_run.call_args.args[0] is mock_handler.lookup
+        assert install_threads[0].startswith('dep_cache_install')
+    
+    @patch('interfaces.api.handler')
+    def test_cache_dependencies_streams_uploads_to_disk(self, mock_handler, client):
+        """Test that uploads reach the handler as files on disk, not bytes."""
+        seen = {}
+        
+        def install(request, request_hash):
+            seen['manifest'] = request.manifest_path.read_bytes()
+            seen['lockfile'] = request.lockfile_path.read_bytes()
+            seen['manifest_content'] = request.manifest_content
+            seen['upload_dir'] = request.manifest_path.parent
+            return CacheResponse(
+                bundle_hash='abc123',
+                download_url='/download/abc123.zip',
+                is_cache_hit=False
+            )
+        
+        mock_handler.lookup.return_value = (None, 'abc123')
+        mock_handler.install.side_effect = install
+        
+        files = [
+            ('file', ('package-lock.json', BytesIO(b'lockfile content'), 'application/json')),
+            ('file', ('package.json', BytesIO(b'manifest content'), 'application/json'))
+        ]
+        data = {
+            'manager': 'npm',
+            'hash': 'abc123',
+            'versions': json.dumps({'node': '14.17.0', 'npm': '6.14.13'})
+        }
+        
+        response = client.post("/v1/cache", data=data, files=files)
+        
+        assert response.status_code == 200
+        assert seen['manifest'] == b'manifest content'
+        assert seen['lockfile'] == b'lockfile content'
+        assert seen['manifest_content'] == b''
+        # The upload directory is removed once the request is handled
+        assert not seen['upload_dir'].exists()
+    
+    @patch('interfaces.api.handler')
+    def test_cache_dependencies_empty_lockfile_is_ignored(self, mock_handler, client):
+        """Test that an empty lockfile upload is treated as missing."""
+        mock_handler.lookup.return_value = (None, 'abc123')
+        mock_handler.install.return_value = CacheResponse(
+            bundle_hash='abc123',
+            download_url='/download/abc123.zip',
+            is_cache_hit=False
+        )
+        
+        files = [
+            ('file', ('package-lock.json', BytesIO(b''), 'application/json')),
+            ('file', ('package.json', BytesIO(b'manifest content'), 'application/json'))
+        ]
+        data = {
+            'manager': 'npm',
+            'hash': 'abc123',
+            'versions': json.dumps({'node': '14.17.0', 'npm': '6.14.13'})
+        }
+        
+        response = client.post("/v1/cache", data=data, files=files)
+        
+        assert response.status_code == 200
+        cache_request = mock_handler.lookup.call_args.args[0]
+        assert cache_request.lockfile_path is None
+    
     def test_cache_dependencies_validation_error(self, client):
         """Test cache request with validation error."""
         # Create multipart form data with invalid manager
@@ -104,13 +209,11 @@ class TestAPI:
         assert response.status_code == 400
         assert 'Unsupported manager' in response.json()['detail']
     
-    @patch('interfaces.api.HandleCacheRequest')
-    def test_cache_dependencies_internal_error(self, mock_handler_class, client):
+    @patch('interfaces.api.handler')
+    def test_cache_dependencies_internal_error(self, mock_handler, client):
         """Test cache request with internal error."""
         # Arrange
-        mock_handler = Mock()
-        mock_handler.handle.side_effect = Exception("Internal error")
-        mock_handler_class.return_value = mock_handler
+        mock_handler.lookup.side_effect = Exception("Internal error")
         
         # Create multipart form data with file[] array
         files = [
@@ -156,6 +259,197 @@ class TestAPI:
         response = client.post("/v1/cache", data=data, files=files)
         assert response.status_code == 422
     
+    def test_handler_shared_across_requests(self, test_app):
+        """Test that one handler is built at startup, reused per request and closed on shutdown."""
+        with TestClient(test_app) as client:
+            handler = api.handler
+            assert isinstance(handler, HandleCacheRequest)
+            
+            response_value = CacheResponse(
+                bundle_hash='abc123',
+                download_url='/download/abc123.zip',
+                is_cache_hit=True
+            )
+            with patch.object(handler, 'lookup', return_value=(response_value, 'abc123')) as mock_lookup:
+                for _ in range(2):
+                    files = [
+                        ('file', ('package.json', BytesIO(b'manifest content'), 'application/json'))
+                    ]
+                    data = {
+                        'manager': 'npm',
+                        'hash': 'abc123',
+                        'versions': json.dumps({'node': '14.17.0', 'npm': '6.14.13'})
+                    }
+                    assert client.post("/v1/cache", data=data, files=files).status_code == 200
+            
+            assert mock_lookup.call_count == 2
+            assert api.handler is handler
+            close = patch.object(handler, 'close', wraps=handler.close).start()
+        
+        close.assert_called_once()
+        patch.stopall()
+    
+    def test_cache_hit_not_blocked_by_queued_installs(self, temp_cache_dir):
+        """Test that a hit is answered while more installs are queued than can run."""
+        
+        test_app = initialize_app(
+            cache_dir=temp_cache_dir,
+            supported_versions={},
+            is_public=True,
+            max_concurrent_installs=1
+        )
+        started = threading.Event()
+        release = threading.Event()
+        
+        def lookup(request):
+            if request.manifest_path.read_bytes() == b'hit':
+                return CacheResponse('h' * 64, '/download/' + 'h' * 64 + '.zip', True), 'h' * 64
+            return None, 'm' * 64
+        
+        def install(request, request_hash):
+            started.set()
+            release.wait(10)
+            return CacheResponse(request_hash, f'/download/{request_hash}.zip', False)
+        
+        def post(manifest):
+            files = [('file', ('package.json', BytesIO(manifest), 'application/json'))]
+            data = {
+                'manager': 'npm',
+                'hash': 'abc123',
+                'versions': json.dumps({'node': '14.17.0', 'npm': '6.14.13'})
+            }
+            return client.post("/v1/cache", data=data, files=files)
+        
+        with TestClient(test_app) as client, \
+                patch.object(api.handler, 'lookup', side_effect=lookup), \
+                patch.object(api.handler, 'install', side_effect=install), \
+                ThreadPoolExecutor(max_workers=8) as pool:
+            try:
+                misses = [pool.submit(post, b'miss') for _ in range(6)]
+                assert started.wait(5)
+                
+                start = time.monotonic()
+                hit = post(b'hit')
+                elapsed = time.monotonic() - start
+            finally:
+                release.set()
+            
+            assert all(miss.result(10).status_code == 200 for miss in misses)
+        
+        assert hit.status_code == 200
+        assert hit.json()['cache_hit'] is True
+        assert elapsed < 2
+    
+    def test_identical_misses_share_one_install(self, test_app):
+        """Test that concurrent misses for the same hash await a single install."""
+        release = threading.Event()
+        waiters = []
+        real_shield = asyncio.shield
+        
+        def shield(future):
+            waiters.append(future)
+            return real_shield(future)
+        
+        def install(request, request_hash):
+            release.wait(10)
+            return CacheResponse(request_hash, f'/download/{request_hash}.zip', False)
+        
+        def post():
+            files = [('file', ('package.json', BytesIO(b'manifest content'), 'application/json'))]
+            data = {
+                'manager': 'npm',
+                'hash': 'abc123',
+                'versions': json.dumps({'node': '14.17.0', 'npm': '6.14.13'})
+            }
+            return client.post("/v1/cache", data=data, files=files)
+        
+        with TestClient(test_app) as client, \
+                patch.object(api.handler, 'lookup', return_value=(None, 'c' * 64)), \
+                patch.object(api.handler, 'install', side_effect=install) as mock_install, \
+                patch('interfaces.api.asyncio.shield', side_effect=shield), \
+                ThreadPoolExecutor(max_workers=3) as pool:
+            try:
+                requests = [pool.submit(post) for _ in range(3)]
+                deadline = time.monotonic() + 5
+                while len(waiters) < 3 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+            finally:
+                release.set()
+            responses = [request.result(10) for request in requests]
+        
+        assert mock_install.call_count == 1
+        assert len({id(waiter) for waiter in waiters}) == 1
+        assert [response.json()['download_url'] for response in responses] == \
+            ['http://localhost:8000/download/' + 'c' * 64 + '.zip'] * 3
+        assert api.inflight_installs == {}
+    
+    def test_failed_install_is_forgotten(self, test_app):
+        """Test that a failed install is reported and the next miss starts a new one."""
+        with TestClient(test_app) as client, \
+                patch.object(api.handler, 'lookup', return_value=(None, 'c' * 64)), \
+                patch.object(api.handler, 'install', side_effect=RuntimeError('npm error')) as mock_install:
+            for _ in range(2):
+                files = [('file', ('package.json', BytesIO(b'manifest content'), 'application/json'))]
+                data = {
+                    'manager': 'npm',
+                    'hash': 'abc123',
+                    'versions': json.dumps({'node': '14.17.0', 'npm': '6.14.13'})
+                }
+                response = client.post("/v1/cache", data=data, files=files)
+                assert response.status_code == 500
+                assert 'npm error' in response.json()['detail']
+        
+        assert mock_install.call_count == 2
+        assert api.inflight_installs == {}
+    
+    def test_cancelled_install_leader_keeps_install_inputs(self, tmp_path):
+        """Test that followers still get the install result when the request that started it is cancelled."""
+        release = threading.Event()
+        staged = []
+        
+        def install(request, request_hash):
+            release.wait(10)
+            staged.append((request.manifest_path, request.manifest_path.read_bytes()))
+            return CacheResponse(request_hash, f'/download/{request_hash}.zip', False)
+        
+        upload_dir = tmp_path / 'upload'
+        upload_dir.mkdir()
+        (upload_dir / 'package.json').write_bytes(b'manifest content')
+        cache_request = CacheRequest(
+            manager='npm',
+            versions={'node': '14.17.0', 'npm': '6.14.13'},
+            manifest_path=upload_dir / 'package.json'
+        )
+        
+        async def scenario():
+            leader = asyncio.ensure_future(api._install(cache_request, 'c' * 64))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(api._install(cache_request, 'c' * 64))
+            await asyncio.sleep(0)
+            
+            # A cancelled leader leaves its upload block, removing the upload directory
+            leader.cancel()
+            shutil.rmtree(upload_dir)
+            release.set()
+            
+            with pytest.raises(asyncio.CancelledError):
+                await leader
+            return await follower
+        
+        with ThreadPoolExecutor(max_workers=1) as executor, \
+                patch('interfaces.api.handler') as mock_handler, \
+                patch('interfaces.api.install_executor', executor):
+            mock_handler.install.side_effect = install
+            response = asyncio.run(scenario())
+        
+        assert response.bundle_hash == 'c' * 64
+        assert mock_handler.install.call_count == 1
+        (install_manifest, content), = staged
+        assert content == b'manifest content'
+        # The install's own copy of the uploads is removed once it finishes
+        assert not install_manifest.parent.exists()
+        assert api.inflight_installs == {}
+    
     def test_download_bundle_success(self, client, temp_cache_dir):
         """Test successful bundle download."""
         # Create a test ZIP file using the same directory structure as the repository
@@ -174,6 +468,7 @@ class TestAPI:
         assert response.status_code == 200
         assert response.headers['content-type'] == 'application/zip'
         assert f'filename={bundle_hash}.zip' in response.headers['content-disposition']
+        assert response.headers['content-length'] == '4'
         assert response.content.startswith(b'PK\x03\x04')
     
     def test_download_bundle_not_found(self, client):
@@ -302,14 +597,12 @@ class TestAPI:
                 assert 'Invalid API key' in response.json()['detail']
                 
                 # Request with valid API key
-                with patch('interfaces.api.HandleCacheRequest') as mock_handler_class:
-                    mock_handler = Mock()
-                    mock_handler.handle.return_value = CacheResponse(
+                with patch('interfaces.api.handler') as mock_handler:
+                    mock_handler.lookup.return_value = (CacheResponse(
                         bundle_hash='abc123',
                         download_url='/download/abc123.zip',
                         is_cache_hit=True
-                    )
-                    mock_handler_class.return_value = mock_handler
+                    ), 'abc123')
                     
                     files = [
                         ('file', ('package-lock.json', BytesIO(b'content'), 'application/json')),
@@ -403,6 +696,23 @@ class TestAPIEdgeCases:
         assert response.status_code == 400
         assert "Invalid versions JSON" in response.json()["detail"]
     
+    def test_cache_request_with_invalid_custom_args(self, client):
+        """Test cache request with custom_args that are not a JSON array."""
+        files = [
+            ('file', ('package.json', BytesIO(b'{}'), 'application/json'))
+        ]
+        for custom_args in ('not json', '{"flag": true}'):
+            data = {
+                'manager': 'npm',
+                'hash': 'test_hash',
+                'versions': json.dumps({'node': '14.17.0', 'npm': '6.14.13'}),
+                'custom_args': custom_args
+            }
+            response = client.post("/v1/cache", data=data, files=files)
+            
+            assert response.status_code == 400
+            assert response.json()["detail"].startswith("Invalid custom_args")
+    
     def test_cache_request_with_empty_files(self, client):
         """Test cache request with empty file content."""
         files = [
@@ -420,17 +730,16 @@ class TestAPIEdgeCases:
         assert response.status_code == 400
         assert "Missing required manifest file" in response.json()["detail"]
     
-    @patch('interfaces.api.HandleCacheRequest')
-    def test_cache_request_without_lockfile_npm(self, mock_handler_class, client):
+    @patch('interfaces.api.handler')
+    def test_cache_request_without_lockfile_npm(self, mock_handler, client):
         """Test npm cache request without lockfile (should run npm install)."""
         # Arrange
-        mock_handler = Mock()
-        mock_handler.handle.return_value = CacheResponse(
+        mock_handler.lookup.return_value = (None, 'generated123')
+        mock_handler.install.return_value = CacheResponse(
             bundle_hash='generated123',
             download_url='/download/generated123.zip',
             is_cache_hit=False
         )
-        mock_handler_class.return_value = mock_handler
         
         # Only provide manifest file, no lockfile
         files = [
@@ -451,14 +760,13 @@ class TestAPIEdgeCases:
     
     def test_cache_request_without_lockfile_composer(self, client):
         """Test composer cache request without lockfile (always optional)."""
-        with patch('interfaces.api.HandleCacheRequest') as mock_handler_class:
-            mock_handler = Mock()
-            mock_handler.handle.return_value = CacheResponse(
+        with patch('interfaces.api.handler') as mock_handler:
+            mock_handler.lookup.return_value = (None, 'composer123')
+            mock_handler.install.return_value = CacheResponse(
                 bundle_hash='composer123',
                 download_url='/download/composer123.zip',
                 is_cache_hit=False
             )
-            mock_handler_class.return_value = mock_handler
             
             # Only provide composer.json, no composer.lock
             files = [
@@ -568,3 +876,14 @@ class TestAPIEdgeCases:
                 headers={"Authorization": "Bearer "}
             )
             assert response.status_code == 401
+    
+    def test_match_upload_filenames(self):
+        """Test identifying uploads as manifest or lockfile."""
+        manifest_path = Path('/upload/package.json')
+        lockfile_path = Path('/upload/package-lock.json')
+        
+        assert _match_upload('package.json', manifest_path, lockfile_path) == manifest_path
+        assert _match_upload('package-lock.json', manifest_path, lockfile_path) == lockfile_path
+        assert _match_upload('Package.JSON', manifest_path, lockfile_path) == manifest_path
+        assert _match_upload('app/package-lock.json', manifest_path, lockfile_path) == lockfile_path
+        assert _match_upload('README.md', manifest_path, lockfile_path) is None
@@ -123,6 +123,53 @@ class TestFileSystemCacheRepository:
             assert zf.read("file1.txt") == b"content1"
             assert zf.read("dir/file2.txt") == b"content2"
     
+    def test_generate_bundle_zip_uses_zip64_for_large_blobs(self, repository, monkeypatch):
+        # Lower the ZIP64 threshold so a small blob stands in for one over 2 GiB
+        monkeypatch.setattr(zipfile, "ZIP64_LIMIT", 1024)
+        content = os.urandom(4096)
+        files = [DependencyFile("large.bin", content)]
+        dep_set = DependencySet("npm", files, node_version="14.0.0", npm_version="8.0.0")
+        bundle_hash = dep_set.calculate_bundle_hash()
+        repository.store_dependency_set(dep_set)
+        
+        bundle_path = repository.generate_bundle_zip(bundle_hash)
+        assert bundle_path is not None
+        
+        with zipfile.ZipFile(bundle_path, 'r') as zf:
+            assert zf.getinfo("large.bin").file_size == len(content)
+            assert zf.read("large.bin") == content
+    
+    def test_generate_bundle_zip_skips_existing_bundle(self, repository, monkeypatch):
+        files = [DependencyFile("file1.txt", b"content1")]
+        dep_set = DependencySet("npm", files, node_version="14.0.0", npm_version="8.0.0")
+        bundle_hash = dep_set.calculate_bundle_hash()
+        repository.store_dependency_set(dep_set)
+        bundle_path = repository.generate_bundle_zip(bundle_hash)
+        
+        def fail(*args, **kwargs):
+            raise AssertionError("existing bundle must not be rebuilt")
+        
+        monkeypatch.setattr(repository.zip_util, "create_zip_from_blobs", fail)
+        
+        assert repository.generate_bundle_zip(bundle_hash) == bundle_path
+    
+    def test_generate_bundle_zip_failure_leaves_no_partial_bundle(self, repository, monkeypatch):
+        files = [DependencyFile("file1.txt", b"content1")]
+        dep_set = DependencySet("npm", files, node_version="14.0.0", npm_version="8.0.0")
+        bundle_hash = dep_set.calculate_bundle_hash()
+        repository.store_dependency_set(dep_set)
+        
+        def partial_write(zip_path, index_data, blob_storage):
+            zip_path.write_bytes(b"PK partial")
+            raise OSError("disk full")
+        
+        monkeypatch.setattr(repository.zip_util, "create_zip_from_blobs", partial_write)
+        
+        assert repository.generate_bundle_zip(bundle_hash) is None
+        assert not repository.has_bundle(bundle_hash)
+        bundle_dir = repository._get_bundle_path(bundle_hash).parent
+        assert list(bundle_dir.iterdir()) == []
+    
     def test_get_bundle_zip_path_returns_existing(self, repository, temp_cache_dir):
         bundle_hash = "test_bundle_hash"
         bundle_path = temp_cache_dir / "bundles" / "te" / "st" / "test_bundle_hash.zip"
@@ -214,6 +261,73 @@ class TestFileSystemCacheRepository:
         retrieved = repository.get_blob(actual_hash)
         assert retrieved == content
     
+    def test_store_blob_file(self, repository, temp_cache_dir):
+        content = b"streamed content"
+        source = temp_cache_dir / "source.txt"
+        source.write_bytes(content)
+        
+        hasher = hashlib.new(HASH_ALGORITHM)
+        hasher.update(content)
+        actual_hash = hasher.hexdigest()
+        
+        repository.store_blob_file(actual_hash, source)
+        
+        assert repository.get_blob(actual_hash) == content
+    
+    def test_has_blob(self, repository):
+        content = b"blob content"
+        hasher = hashlib.new(HASH_ALGORITHM)
+        hasher.update(content)
+        actual_hash = hasher.hexdigest()
+        
+        assert not repository.has_blob(actual_hash)
+        
+        repository.store_blob(actual_hash, content)
+        
+        assert repository.has_blob(actual_hash)
+    
+    def test_store_blob_skips_existing_blob(self, repository, temp_cache_dir, monkeypatch):
+        content = b"blob content"
+        source = temp_cache_dir / "source.txt"
+        source.write_bytes(content)
+        hasher = hashlib.new(HASH_ALGORITHM)
+        hasher.update(content)
+        actual_hash = hasher.hexdigest()
+        repository.store_blob(actual_hash, content)
+        
+        def fail(*args, **kwargs):
+            raise AssertionError("existing blob must not be rewritten")
+        
+        monkeypatch.setattr(repository, "_write_atomically", fail)
+        
+        repository.store_blob(actual_hash, content)
+        repository.store_blob_file(actual_hash, source)
+        assert repository.get_blob(actual_hash) == content
+    
+    def test_store_dependency_set_with_source_paths(self, repository, temp_cache_dir):
+        source = temp_cache_dir / "index.js"
+        source.write_bytes(b"module.exports = {};")
+        
+        dep_set = DependencySet("npm", [DependencyFile("lib/index.js", source_path=source)])
+        bundle_hash = repository.store_dependency_set(dep_set)
+        
+        index = repository.get_index(bundle_hash)
+        assert repository.get_blob(index["lib/index.js"]) == b"module.exports = {};"
+    
+    def test_concurrent_store_blob_same_hash(self, repository, temp_cache_dir):
+        import concurrent.futures
+        
+        content = b"shared content" * 1000
+        blob_hash = hashlib.new(HASH_ALGORITHM, content).hexdigest()
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _: repository.store_blob(blob_hash, content), range(32)))
+        
+        assert repository.get_blob(blob_hash) == content
+        # Temporary files are always renamed into place or removed
+        objects = [p for p in (temp_cache_dir / "objects").rglob("*") if p.is_file()]
+        assert objects == [repository.get_blob_path(blob_hash)]
+    
     def test_get_cache_stats(self, repository):
         files = [
             DependencyFile("file1.txt", b"content1"),
@@ -2,10 +2,14 @@ import pytest
 from unittest.mock import Mock, MagicMock, patch, PropertyMock
 import tempfile
 import os
+import hashlib
+import threading
+from pathlib import Path
 
-from application.handle_cache_request import HandleCacheRequest
+from application.handle_cache_request import HandleCacheRequest, HitCache, WorkspacePool
 from application.dtos import CacheRequest, CacheResponse, FileData, InstallationResult
 from domain.dependency_set import DependencySet, DependencyFile
+from domain.hash_constants import HASH_ALGORITHM
 from domain.installer import DependencyInstaller
 from infrastructure.file_system_cache_repository import FileSystemCacheRepository
 from infrastructure.docker_utils import DockerUtils
@@ -225,30 +229,23 @@ class TestHandleCacheRequest:
         
         mock_cache_repository.has_bundle.return_value = False
         
-        # Mock installer for file names
-        mock_installer_for_hash = Mock()
-        mock_installer_for_hash.lockfile_name = 'package-lock.json'
-        mock_installer_for_hash.manifest_name = 'package.json'
-        
-        # Mock failed installation
-        mock_installer_for_install = Mock(spec=DependencyInstaller)
-        mock_installer_for_install.lockfile_name = 'package-lock.json'
-        mock_installer_for_install.manifest_name = 'package.json'
-        mock_installer_for_install.install.return_value = InstallationResult(
+        # Mock failed installation (the same installer serves hash calculation and install)
+        mock_installer = Mock(spec=DependencyInstaller)
+        mock_installer.lockfile_name = 'package-lock.json'
+        mock_installer.manifest_name = 'package.json'
+        mock_installer.install.return_value = InstallationResult(
             success=False,
             files=[],
             error_message='Installation failed: npm error'
         )
-        
-        # Return different mocks for different calls
-        mock_installer_factory.create_installer.side_effect = [
-            mock_installer_for_hash,  # For hash calculation
-            mock_installer_for_install  # For actual installation
-        ]
+        mock_installer_factory.create_installer.return_value = mock_installer
         
         # Act & Assert
         with pytest.raises(RuntimeError, match='Installation failed: npm error'):
             handler.handle(request)
+        
+        # Installer is built once per request
+        mock_installer_factory.create_installer.assert_called_once()
     
     def test_unsupported_manager(self, handler, mock_cache_repository, mock_installer_factory):
         """Test handling unsupported package manager."""
@@ -304,20 +301,30 @@ class TestHandleCacheRequest:
         # Unknown manager - now returns True since no versions are configured
         assert handler._is_version_supported('unknown', {'runtime': '1.0.0'})
     
-    def test_version_support_with_api_format(self, handler):
+    def test_version_support_with_api_format(self, mock_cache_repository, mock_installer_factory,
+                                             mock_docker_utils, supported_versions):
         """Test version support with actual API request format (node/npm keys)."""
+        # Supported versions are indexed at construction, so configure yarn and composer up front
+        handler = HandleCacheRequest(
+            cache_repository=mock_cache_repository,
+            installer_factory=mock_installer_factory,
+            docker_utils=mock_docker_utils,
+            supported_versions={
+                **supported_versions,
+                'yarn': [{'runtime': '14.17.0', 'package_manager': '1.22.0'}],
+                'composer': [{'runtime': '8.1.0'}]
+            },
+            use_docker_on_version_mismatch=True
+        )
+        
         # Test npm with node/npm keys (as sent by API)
         assert handler._is_version_supported('npm', {'node': '14.17.0', 'npm': '6.14.13'})
         assert not handler._is_version_supported('npm', {'node': '18.0.0', 'npm': '9.0.0'})
         
-        # Test yarn with node/yarn keys (need to add yarn to supported versions first)
-        handler.supported_versions['yarn'] = [
-            {'runtime': '14.17.0', 'package_manager': '1.22.0'}
-        ]
+        # Test yarn with node/yarn keys
         assert handler._is_version_supported('yarn', {'node': '14.17.0', 'yarn': '1.22.0'})
         
         # Test composer with php key
-        handler.supported_versions['composer'] = [{'runtime': '8.1.0'}]
         assert handler._is_version_supported('composer', {'php': '8.1.0'})
         assert not handler._is_version_supported('composer', {'php': '7.0.0'})
     
@@ -499,4 +506,593 @@ class TestHandleCacheRequest:
             handler._determine_installation_method(
                 'npm', 
                 {'node': '18.0.0', 'npm': '9.0.0'}  # Unsupported in API format
-            )
\ No newline at end of file
+            )
+    
+    def test_cache_hit_with_client_hash_skips_installer(self, handler, mock_cache_repository, mock_installer_factory):
+        """Test that a cached client hash is answered without building an installer."""
+        client_hash = 'a' * 64
+        request = CacheRequest(
+            manager='npm',
+            versions={'node': '14.17.0', 'npm': '6.14.13'},
+            lockfile_content=b'lockfile content',
+            manifest_content=b'manifest content',
+            client_hash=client_hash
+        )
+        mock_cache_repository.get_index.return_value = {'foo/index.js': 'b' * 64}
+        mock_cache_repository.has_bundle.return_value = True
+        
+        response = handler.handle(request)
+        
+        assert response.bundle_hash == client_hash
+        assert response.is_cache_hit is True
+        mock_cache_repository.has_bundle.assert_called_once_with(client_hash)
+        mock_installer_factory.create_installer.assert_not_called()
+    
+    def test_client_hash_mismatch_on_cache_miss(self, handler, mock_cache_repository, mock_installer_factory):
+        """Test that a miss with a client hash differing from the server hash is stored under the server hash."""
+        client_hash = 'a' * 64
+        request = CacheRequest(
+            manager='npm',
+            versions={'node': '14.17.0', 'npm': '6.14.13'},
+            lockfile_content=b'lockfile content',
+            manifest_content=b'manifest content',
+            client_hash=client_hash
+        )
+        mock_cache_repository.get_index.return_value = None
+        
+        mock_installer = Mock(spec=DependencyInstaller)
+        mock_installer.lockfile_name = 'package-lock.json'
+        mock_installer.manifest_name = 'package.json'
+        mock_installer.install.return_value = InstallationResult(
+            success=True,
+            files=[FileData('foo/index.js', b'console.log("foo")')],
+            error_message=None
+        )
+        mock_installer_factory.create_installer.return_value = mock_installer
+        server_hash = handler._calculate_bundle_hash(request)
+        assert server_hash != client_hash
+        
+        response = handler.handle(request)
+        
+        assert response.bundle_hash == server_hash
+        assert response.download_url == f'/download/{server_hash}.zip'
+        assert response.is_cache_hit is False
+        mock_installer.install.assert_called_once()
+        mock_cache_repository.save_index.assert_called_once()
+        assert mock_cache_repository.save_index.call_args.args[0] == server_hash
+        mock_cache_repository.generate_bundle_zip.assert_called_once_with(server_hash)
+    
+    def test_client_hash_mismatch_hits_server_hash(self, handler, mock_cache_repository, mock_installer_factory):
+        """Test that a differing client hash still gets a hit when the server hash is cached."""
+        request = CacheRequest(
+            manager='npm',
+            versions={'node': '14.17.0', 'npm': '6.14.13'},
+            lockfile_content=b'lockfile content',
+            manifest_content=b'manifest content',
+            client_hash='a' * 64
+        )
+        mock_installer = Mock(spec=DependencyInstaller)
+        mock_installer.lockfile_name = 'package-lock.json'
+        mock_installer.manifest_name = 'package.json'
+        mock_installer_factory.create_installer.return_value = mock_installer
+        server_hash = handler._calculate_bundle_hash(request)
+        mock_cache_repository.get_index.side_effect = (
+            lambda bundle_hash: {'foo/index.js': 'b' * 64} if bundle_hash == server_hash else None
+        )
+        mock_cache_repository.has_bundle.return_value = True
+        
+        response = handler.handle(request)
+        
+        assert response.bundle_hash == server_hash
+        assert response.is_cache_hit is True
+        mock_installer.install.assert_not_called()
+    
+    @patch('application.handle_cache_request.DependencySet')
+    def test_malformed_client_hash_falls_back_to_server_hash(self, mock_dep_set_class, handler,
+                                                             mock_cache_repository, mock_installer_factory):
+        """Test that a client hash unsafe for cache paths is ignored in favour of the server hash."""
+        request = CacheRequest(
+            manager='npm',
+            versions={'node': '14.17.0', 'npm': '6.14.13'},
+            lockfile_content=b'lockfile content',
+            manifest_content=b'manifest content',
+            client_hash='test/../../../etc/passwd'
+        )
+        server_hash = 'd' * 64
+        mock_cache_repository.has_bundle.return_value = True
+        
+        mock_installer = Mock()
+        mock_installer.lockfile_name = 'package-lock.json'
+        mock_installer.manifest_name = 'package.json'
+        mock_installer_factory.create_installer.return_value = mock_installer
+        
+        mock_dep_set = Mock()
+        mock_dep_set.calculate_bundle_hash.return_value = server_hash
+        mock_dep_set_class.return_value = mock_dep_set
+        
+        response = handler.handle(request)
+        
+        assert response.bundle_hash == server_hash
+        assert response.is_cache_hit is True
+        mock_cache_repository.get_index.assert_called_once_with(server_hash)
+    
+    def test_installer_reused_for_identical_arguments(self, handler, mock_installer_factory):
+        """Test that installers are cached per (manager, versions, custom_args)."""
+        mock_installer_factory.create_installer.side_effect = lambda *args: Mock()
+        
+        def make_request(versions, custom_args=None):
+            return CacheRequest(
+                manager='npm',
+                versions=versions,
+                lockfile_content=b'',
+                manifest_content=b'manifest content',
+                custom_args=custom_args
+            )
+        
+        first = handler._get_installer(make_request({'node': '14.17.0', 'npm': '6.14.13'}))
+        same = handler._get_installer(make_request({'npm': '6.14.13', 'node': '14.17.0'}))
+        with_args = handler._get_installer(make_request({'node': '14.17.0', 'npm': '6.14.13'}, ['--production']))
+        
+        assert first is same
+        assert with_args is not first
+        assert mock_installer_factory.create_installer.call_count == 2
+    
+    def test_installer_cache_shared_between_threads(self, handler, mock_installer_factory):
+        """Test that concurrent lookups and installs can fill and evict the installer cache."""
+        mock_installer_factory.create_installer.side_effect = lambda *args: Mock()
+        errors = []
+        
+        def get_installers(worker):
+            try:
+                for i in range(200):
+                    handler._get_installer(CacheRequest(
+                        manager='npm',
+                        versions={'node': f'{worker}.{i}', 'npm': '6.14.13'},
+                        manifest_content=b'manifest content'
+                    ))
+            except Exception as e:
+                errors.append(e)
+        
+        with patch('application.handle_cache_request.INSTALLER_CACHE_SIZE', 8):
+            threads = [threading.Thread(target=get_installers, args=(worker,)) for worker in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        
+        assert errors == []
+        assert len(handler._installer_cache) <= 8
+    
+    def test_version_support_partial_supported_entry(self, mock_cache_repository, mock_installer_factory, mock_docker_utils):
+        """Test that a supported entry listing only the runtime matches any package manager version."""
+        handler = HandleCacheRequest(
+            cache_repository=mock_cache_repository,
+            installer_factory=mock_installer_factory,
+            docker_utils=mock_docker_utils,
+            supported_versions={'npm': [{'runtime': '14.17.0'}]}
+        )
+        
+        assert handler._is_version_supported('npm', {'node': '14.17.0', 'npm': '6.14.13'})
+        assert not handler._is_version_supported('npm', {'node': '16.13.0', 'npm': '6.14.13'})
+        
+        # Unhashable values never match configured version strings
+        assert not handler._is_version_supported('npm', {'node': ['14.17.0'], 'npm': '6.14.13'})
+    
+    def test_store_dependency_set_streams_source_paths(self, handler, mock_cache_repository, tmp_path):
+        """Test that path-backed files are hashed from disk and stored with store_blob_file."""
+        source = tmp_path / "index.js"
+        source.write_bytes(b'console.log("foo")')
+        expected_file_hash = hashlib.new(HASH_ALGORITHM, b'console.log("foo")').hexdigest()
+        
+        dependency_set = DependencySet(
+            manager='npm',
+            files=[DependencyFile('foo/index.js', source_path=source)],
+            node_version='14.17.0',
+            npm_version='6.14.13'
+        )
+        
+        handler._store_dependency_set(dependency_set, 'bundle-hash')
+        
+        mock_cache_repository.store_blob_file.assert_called_once_with(expected_file_hash, source)
+        mock_cache_repository.store_blob.assert_not_called()
+        mock_cache_repository.save_index.assert_called_once_with(
+            'bundle-hash', 'npm', '14.17.0_6.14.13', {'foo/index.js': expected_file_hash}
+        )
+    
+    def test_store_dependency_set_in_parallel(self, mock_installer_factory, mock_docker_utils, tmp_path):
+        """Test that blobs stored from the thread pool produce a complete index."""
+        repository = FileSystemCacheRepository(tmp_path / "cache")
+        handler = HandleCacheRequest(
+            cache_repository=repository,
+            installer_factory=mock_installer_factory,
+            docker_utils=mock_docker_utils,
+            supported_versions={}
+        )
+        files = [DependencyFile(f'pkg/file_{i}.js', f'content {i % 10}'.encode()) for i in range(100)]
+        dependency_set = DependencySet(manager='npm', files=files, node_version='14.17.0', npm_version='6.14.13')
+        bundle_hash = 'e' * 64
+        
+        handler._store_dependency_set(dependency_set, bundle_hash)
+        
+        index = repository.get_index(bundle_hash)
+        assert len(index) == 100
+        assert repository.get_blob(index['pkg/file_42.js']) == b'content 2'
+        assert repository.has_bundle(bundle_hash)
+    
+    def test_cache_hit_does_not_wait_for_install_slot(self, mock_cache_repository, mock_installer_factory, mock_docker_utils):
+        """Test that cache hits are answered while every install slot is taken."""
+        install_slots = threading.BoundedSemaphore(1)
+        handler = HandleCacheRequest(
+            cache_repository=mock_cache_repository,
+            installer_factory=mock_installer_factory,
+            docker_utils=mock_docker_utils,
+            supported_versions={},
+            install_slots=install_slots
+        )
+        mock_cache_repository.get_index.return_value = {'foo/index.js': 'b' * 64}
+        mock_cache_repository.has_bundle.return_value = True
+        request = CacheRequest(
+            manager='npm',
+            versions={'node': '14.17.0', 'npm': '6.14.13'},
+            lockfile_content=b'lockfile content',
+            manifest_content=b'manifest content',
+            client_hash='a' * 64
+        )
+        
+        with install_slots:
+            response = handler.handle(request)
+        
+        assert response.is_cache_hit is True
+    
+    def test_request_files_on_disk_match_in_memory_content(self, handler, mock_installer_factory, tmp_path):
+        """Test that uploads given as paths hash and stage like in-memory content."""
+        mock_installer = Mock()
+        mock_installer.lockfile_name = 'package-lock.json'
+        mock_installer.manifest_name = 'package.json'
+        mock_installer_factory.create_installer.return_value = mock_installer
+        
+        manifest_path = tmp_path / 'upload_manifest'
+        manifest_path.write_bytes(b'manifest content')
+        lockfile_path = tmp_path / 'upload_lockfile'
+        lockfile_path.write_bytes(b'lockfile content')
+        
+        versions = {'node': '14.17.0', 'npm': '6.14.13'}
+        in_memory = CacheRequest(
+            manager='npm',
+            versions=versions,
+            lockfile_content=b'lockfile content',
+            manifest_content=b'manifest content'
+        )
+        on_disk = CacheRequest(
+            manager='npm',
+            versions=versions,
+            manifest_path=manifest_path,
+            lockfile_path=lockfile_path
+        )
+        
+        assert handler._calculate_bundle_hash(on_disk) == handler._calculate_bundle_hash(in_memory)
+        
+        work_dir = tmp_path / 'work'
+        work_dir.mkdir()
+        handler._stage_request_files(on_disk, mock_installer, Path(work_dir))
+        
+        assert (work_dir / 'package.json').read_bytes() == b'manifest content'
+        assert (work_dir / 'package-lock.json').read_bytes() == b'lockfile content'
+    
+    def test_repeated_hit_skips_index_lookup(self, handler, mock_cache_repository):
+        """Test that a hash seen cached before is answered without reading its index again."""
+        client_hash = 'a' * 64
+        request = CacheRequest(
+            manager='npm',
+            versions={'node': '14.17.0', 'npm': '6.14.13'},
+            manifest_content=b'manifest content',
+            client_hash=client_hash
+        )
+        mock_cache_repository.get_index.return_value = {'foo/index.js': 'b' * 64}
+        mock_cache_repository.has_bundle.return_value = True
+        
+        assert handler.handle(request).is_cache_hit is True
+        assert handler.handle(request).is_cache_hit is True
+        
+        mock_cache_repository.get_index.assert_called_once_with(client_hash)
+        assert mock_cache_repository.has_bundle.call_count == 2
+    
+    def test_hit_cache_invalidated_when_bundle_removed(self, handler, mock_cache_repository):
+        """Test that a remembered hash is re-checked in full once its bundle disappears."""
+        bundle_hash = 'a' * 64
+        mock_cache_repository.get_index.return_value = {'foo/index.js': 'b' * 64}
+        mock_cache_repository.has_bundle.return_value = True
+        assert handler._is_cached(bundle_hash) is True
+        
+        mock_cache_repository.has_bundle.return_value = False
+        assert handler._is_cached(bundle_hash) is False
+        assert bundle_hash not in handler._hit_cache
+        assert mock_cache_repository.get_index.call_count == 2
+    
+    def test_workspace_reused_between_installs(self, mock_cache_repository, mock_installer_factory,
+                                               mock_docker_utils, supported_versions):
+        """Test that a pooled workspace keeps installed output but not the request files."""
+        pool = WorkspacePool(max_idle_per_key=1)
+        handler = HandleCacheRequest(
+            cache_repository=mock_cache_repository,
+            installer_factory=mock_installer_factory,
+            docker_utils=mock_docker_utils,
+            supported_versions=supported_versions,
+            workspace_pool=pool
+        )
+        mock_cache_repository.get_index.return_value = None
+        
+        seen = []
+        
+        def install(work_dir):
+            work_path = Path(work_dir)
+            seen.append((work_path, (work_path / 'vendor').exists()))
+            (work_path / 'vendor').mkdir(exist_ok=True)
+            (work_path / 'vendor' / 'autoload.php').write_bytes(b'<?php')
+            return InstallationResult(
+                success=True,
+                files=[FileData('vendor/autoload.php', source_path=work_path / 'vendor' / 'autoload.php')],
+                error_message=None
+            )
+        
+        mock_installer = Mock(spec=DependencyInstaller)
+        mock_installer.lockfile_name = 'composer.lock'
+        mock_installer.manifest_name = 'composer.json'
+        mock_installer.output_folder_name = 'vendor'
+        mock_installer.install.side_effect = install
+        mock_installer_factory.create_installer.return_value = mock_installer
+        
+        versions = {'php': '8.1.0'}
+        try:
+            handler.handle(CacheRequest(manager='composer', versions=versions,
+                                        manifest_content=b'first', lockfile_content=b'lock1'))
+            handler.handle(CacheRequest(manager='composer', versions=versions,
+                                        manifest_content=b'second', lockfile_content=b'lock2'))
+            
+            (first_dir, first_had_output), (second_dir, second_had_output) = seen
+            assert second_dir == first_dir
+            assert first_had_output is False
+            assert second_had_output is True
+            # Request files are removed before the workspace goes back to the pool
+            assert not (first_dir / 'composer.json').exists()
+            assert not (first_dir / 'composer.lock').exists()
+        finally:
+            pool.close()
+        
+        assert not first_dir.exists()
+    
+    @pytest.mark.parametrize('manager,versions,lockfile_content', [
+        ('npm', {'node': '14.17.0', 'npm': '6.14.13'}, b'lock'),
+        ('composer', {'php': '8.1.0'}, b''),
+    ])
+    def test_workspace_not_pooled_without_output_reuse(self, mock_cache_repository, mock_installer_factory,
+                                                        mock_docker_utils, supported_versions,
+                                                        manager, versions, lockfile_content):
+        """Test that installs which can't reuse previous output always get a fresh workspace."""
+        pool = WorkspacePool(max_idle_per_key=1)
+        handler = HandleCacheRequest(
+            cache_repository=mock_cache_repository,
+            installer_factory=mock_installer_factory,
+            docker_utils=mock_docker_utils,
+            supported_versions=supported_versions,
+            workspace_pool=pool
+        )
+        mock_cache_repository.get_index.return_value = None
+        
+        seen = []
+        
+        def install(work_dir):
+            work_path = Path(work_dir)
+            seen.append((work_path, (work_path / 'output').exists()))
+            (work_path / 'output').mkdir(exist_ok=True)
+            (work_path / 'output' / 'index.js').write_bytes(b'module')
+            return InstallationResult(
+                success=True,
+                files=[FileData('output/index.js', source_path=work_path / 'output' / 'index.js')],
+                error_message=None
+            )
+        
+        mock_installer = Mock(spec=DependencyInstaller)
+        mock_installer.lockfile_name = 'lockfile'
+        mock_installer.manifest_name = 'manifest'
+        mock_installer.output_folder_name = 'output'
+        mock_installer.install.side_effect = install
+        mock_installer_factory.create_installer.return_value = mock_installer
+        
+        try:
+            handler.handle(CacheRequest(manager=manager, versions=versions,
+                                        manifest_content=b'first', lockfile_content=lockfile_content))
+            handler.handle(CacheRequest(manager=manager, versions=versions,
+                                        manifest_content=b'second', lockfile_content=lockfile_content))
+            
+            (first_dir, first_had_output), (second_dir, second_had_output) = seen
+            assert first_had_output is False
+            assert second_had_output is False
+            assert not first_dir.exists()
+            assert not second_dir.exists()
+        finally:
+            pool.close()
+    
+    def test_failed_install_workspace_not_reused(self, handler, mock_cache_repository, mock_installer_factory):
+        """Test that a workspace from a failed install is removed instead of pooled."""
+        mock_cache_repository.get_index.return_value = None
+        work_dirs = []
+        
+        mock_installer = Mock(spec=DependencyInstaller)
+        mock_installer.lockfile_name = 'package-lock.json'
+        mock_installer.manifest_name = 'package.json'
+        mock_installer.output_folder_name = 'node_modules'
+        mock_installer.install.side_effect = lambda work_dir: work_dirs.append(work_dir) or InstallationResult(
+            success=False, files=[], error_message='npm error'
+        )
+        mock_installer_factory.create_installer.return_value = mock_installer
+        
+        request = CacheRequest(
+            manager='npm',
+            versions={'node': '14.17.0', 'npm': '6.14.13'},
+            manifest_content=b'manifest content'
+        )
+        with pytest.raises(RuntimeError):
+            handler.handle(request)
+        
+        assert not os.path.exists(work_dirs[0])
+    
+    def test_stage_file_links_upload_without_copying(self, tmp_path):
+        """Test that an upload on disk is linked into the workspace rather than copied."""
+        source = tmp_path / 'upload.json'
+        source.write_bytes(b'manifest content')
+        target = tmp_path / 'package.json'
+        
+        HandleCacheRequest._stage_file(source, b'', target)
+        
+        assert target.read_bytes() == b'manifest content'
+        assert os.path.samefile(source, target)
+    
+    def test_stage_file_copies_when_link_fails(self, tmp_path):
+        """Test that staging falls back to a copy when the upload can't be linked."""
+        source = tmp_path / 'upload.json'
+        source.write_bytes(b'manifest content')
+        target = tmp_path / 'package.json'
+        
+        with patch('application.handle_cache_request.os.link', side_effect=OSError('cross-device link')):
+            HandleCacheRequest._stage_file(source, b'', target)
+        
+        assert target.read_bytes() == b'manifest content'
+        assert not os.path.samefile(source, target)
+    
+    @pytest.mark.parametrize('manager,versions,expected', [
+        ('npm', {'node': '14.17.0', 'npm': '6.14.13'}, {'node_version': '14.17.0', 'npm_version': '6.14.13'}),
+        ('npm', {'runtime': '14.17.0', 'package_manager': '6.14.13'}, {'node_version': '14.17.0', 'npm_version': '6.14.13'}),
+        ('yarn', {'node': '16.13.0', 'yarn': '1.22.0'}, {'node_version': '16.13.0', 'npm_version': '1.22.0'}),
+        # API keys win over internal keys
+        ('npm', {'node': '14.17.0', 'runtime': '16.13.0'}, {'node_version': '14.17.0'}),
+        ('composer', {'php': '8.1.0'}, {'php_version': '8.1.0'}),
+        ('unknown', {'runtime': '1.0.0'}, {}),
+    ])
+    def test_get_version_kwargs(self, handler, manager, versions, expected):
+        """Test mapping request versions to DependencySet keyword arguments."""
+        assert handler._get_version_kwargs(manager, versions) == expected
+    
+    def test_version_support_alias_normalization(self, mock_cache_repository, mock_installer_factory, mock_docker_utils):
+        """Test that request version aliases are matched against the supported versions format."""
+        handler = HandleCacheRequest(
+            cache_repository=mock_cache_repository,
+            installer_factory=mock_installer_factory,
+            docker_utils=mock_docker_utils,
+            supported_versions={
+                'yarn': [{'runtime': '16.13.0', 'package_manager': '1.22.0'}],
+                'composer': [{'runtime': '8.1.0'}],
+                'custom': [{'runtime': '1.0.0'}]
+            }
+        )
+        
+        assert handler._is_version_supported('yarn', {'node': '16.13.0', 'yarn': '1.22.0'})
+        assert handler._is_version_supported('composer', {'php': '8.1.0'})
+        assert handler._is_version_supported('custom', {'runtime': '1.0.0'})
+        assert not handler._is_version_supported('composer', {'php': '7.4.0'})
+    
+    def test_store_dependency_set_leaves_existence_check_to_repository(self, handler, mock_cache_repository,
+                                                                       tmp_path):
+        """Test that blobs are handed to the repository without a separate existence check."""
+        source = tmp_path / 'index.js'
+        source.write_bytes(b'module.exports = 1;')
+        files = [
+            DependencyFile('node_modules/a/index.js', source_path=source),
+            DependencyFile('node_modules/a/LICENSE', b'MIT')
+        ]
+        dependency_set = DependencySet(manager='npm', files=files, node_version='14.17.0', npm_version='6.14.13')
+        
+        handler._store_dependency_set(dependency_set, 'f' * 64)
+        
+        mock_cache_repository.has_blob.assert_not_called()
+        index_data = mock_cache_repository.save_index.call_args.args[3]
+        mock_cache_repository.store_blob_file.assert_called_once_with(index_data['node_modules/a/index.js'], source)
+        mock_cache_repository.store_blob.assert_called_once_with(index_data['node_modules/a/LICENSE'], b'MIT')
+
+
+class TestWorkspacePool:
+    """Test cases for the install workspace pool."""
+    
+    def test_release_and_acquire_reuses_workspace(self):
+        """Test that a released workspace is handed out again for the same key."""
+        pool = WorkspacePool(max_idle_per_key=1)
+        try:
+            workspace = pool.acquire('npm')
+            pool.release('npm', workspace)
+            
+            assert pool.acquire('npm') == workspace
+            other = pool.acquire('composer')
+            assert other != workspace
+            pool.discard(other)
+        finally:
+            pool.discard(workspace)
+    
+    def test_full_pool_removes_extra_workspaces(self):
+        """Test that workspaces beyond the per-key limit are removed on release."""
+        pool = WorkspacePool(max_idle_per_key=1)
+        first, second = pool.acquire('npm'), pool.acquire('npm')
+        
+        pool.release('npm', first)
+        pool.release('npm', second)
+        
+        assert first.exists()
+        assert not second.exists()
+        pool.close()
+        assert not first.exists()
+    
+    def test_idle_workspaces_bounded_across_keys(self):
+        """Test that the least recently released workspaces are removed once the overall limit is reached."""
+        pool = WorkspacePool(max_idle_per_key=2, max_idle=3)
+        released = []
+        try:
+            for key in range(10):
+                workspace = pool.acquire(key)
+                pool.release(key, workspace)
+                released.append(workspace)
+                assert sum(workspace.exists() for workspace in released) <= 3
+            
+            assert [workspace.exists() for workspace in released] == [False] * 7 + [True] * 3
+            assert pool.acquire(9) == released[9]
+            fresh = pool.acquire(0)
+            assert fresh not in released
+            pool.discard(fresh)
+        finally:
+            pool.close()
+            for workspace in released:
+                pool.discard(workspace)
+    
+    def test_unpooled_keys_are_not_kept(self):
+        """Test that a None key or a zero-size pool never keeps workspaces."""
+        for pool, key in ((WorkspacePool(), None), (WorkspacePool(max_idle_per_key=0), 'npm')):
+            workspace = pool.acquire(key)
+            pool.release(key, workspace)
+            assert not workspace.exists()
+
+
+class TestHitCache:
+    """Test cases for the in-memory cache hit LRU."""
+    
+    def test_add_and_discard(self):
+        """Test remembering and forgetting hashes."""
+        hit_cache = HitCache()
+        hit_cache.add('a' * 64)
+        
+        assert 'a' * 64 in hit_cache
+        hit_cache.discard('a' * 64)
+        assert 'a' * 64 not in hit_cache
+        # Discarding an unknown hash is a no-op
+        hit_cache.discard('b' * 64)
+    
+    def test_evicts_least_recently_used(self):
+        """Test that the least recently used hash is evicted when full."""
+        hit_cache = HitCache(max_size=2)
+        hit_cache.add('first')
+        hit_cache.add('second')
+        assert 'first' in hit_cache  # refresh 'first'
+        
+        hit_cache.add('third')
+        
+        assert len(hit_cache) == 2
+        assert 'second' not in hit_cache
+        assert 'first' in hit_cache
+        assert 'third' in hit_cache
@@ -7,7 +7,8 @@ from domain.installer import (
     DependencyInstaller,
     NpmInstaller,
     ComposerInstaller,
-    InstallerFactory
+    InstallerFactory,
+    iter_files
 )
 
 
@@ -21,20 +22,17 @@ class TestNpmInstaller:
         assert installer.lockfile_name == "package-lock.json"
         assert installer.manifest_name == "package.json"
     
-    @patch('os.walk')
     @patch('subprocess.run')
-    def test_npm_install_success(self, mock_run, mock_walk, tmp_path):
+    def test_npm_install_success(self, mock_run, tmp_path):
         mock_run.return_value = Mock(returncode=0, stderr="")
         # Create a lockfile so npm ci is used
         lockfile_path = tmp_path / "package-lock.json"
         lockfile_path.write_text('{"lockfileVersion": 2}')
         
-        # Mock os.walk to return some files
         node_modules_path = tmp_path / "node_modules"
         node_modules_path.mkdir()
         test_file = node_modules_path / "test.js"
         test_file.write_bytes(b"test content")
-        mock_walk.return_value = [(str(node_modules_path), [], ["test.js"])]
         
         installer = NpmInstaller("14.20.0", "6.14.13")
         result = installer.install(str(tmp_path))
@@ -115,16 +113,13 @@ class TestComposerInstaller:
         assert installer.lockfile_name == "composer.lock"
         assert installer.manifest_name == "composer.json"
     
-    @patch('os.walk')
     @patch('subprocess.run')
-    def test_composer_install_success(self, mock_run, mock_walk, tmp_path):
+    def test_composer_install_success(self, mock_run, tmp_path):
         mock_run.return_value = Mock(returncode=0, stderr="")
-        # Mock os.walk to return some files
         vendor_path = tmp_path / "vendor"
         vendor_path.mkdir()
         test_file = vendor_path / "test.php"
         test_file.write_bytes(b"<?php echo 'test';")
-        mock_walk.return_value = [(str(vendor_path), [], ["test.php"])]
         
         installer = ComposerInstaller("8.1.0")
         result = installer.install(str(tmp_path))
@@ -263,8 +258,7 @@ class TestNpmInstallerEdgeCases:
         assert "ñoño 文字化け" in result.error_message
     
     @patch('subprocess.run')
-    @patch('os.walk')
-    def test_npm_install_with_symlinks(self, mock_walk, mock_run, tmp_path):
+    def test_npm_install_with_symlinks(self, mock_run, tmp_path):
         """Test npm install handling of symlinks in node_modules."""
         mock_run.return_value = Mock(returncode=0, stderr="")
         
@@ -276,12 +270,6 @@ class TestNpmInstallerEdgeCases:
         real_file = real_dir / "some-cli"
         real_file.write_bytes(b"#!/usr/bin/env node\nconsole.log('test');")
         
-        # Mock walk to include our structure
-        mock_walk.return_value = [
-            (str(node_modules), [".bin"], []),
-            (str(real_dir), [], ["some-cli"])
-        ]
-        
         installer = NpmInstaller("14.20.0", "6.14.13")
         result = installer.install(str(tmp_path))
         
@@ -299,6 +287,49 @@ class TestNpmInstallerEdgeCases:
         
         assert result.success is False
         assert result.error_message == "npm install failed: "
+    
+    @patch('subprocess.run')
+    def test_npm_install_collects_file_paths(self, mock_run, tmp_path):
+        """Test that installed files are returned as paths instead of loaded content."""
+        mock_run.return_value = Mock(returncode=0, stderr="")
+        
+        package_dir = tmp_path / "node_modules" / "lib"
+        package_dir.mkdir(parents=True)
+        (package_dir / "index.js").write_bytes(b"module.exports = {};")
+        (package_dir / "link.js").symlink_to(package_dir / "index.js")
+        (package_dir / "broken.js").symlink_to(tmp_path / "missing.js")
+        
+        installer = NpmInstaller("14.20.0", "6.14.13")
+        result = installer.install(str(tmp_path))
+        
+        assert result.success is True
+        files = {f.relative_path: f for f in result.files}
+        assert set(files) == {"lib/index.js", "lib/link.js"}
+        assert files["lib/index.js"].content is None
+        assert files["lib/index.js"].source_path == package_dir / "index.js"
+
+
+class TestIterFiles:
+    """Test cases for the scandir-based directory walk."""
+    
+    def test_iter_files_yields_relative_paths(self, tmp_path):
+        (tmp_path / "a" / "b").mkdir(parents=True)
+        (tmp_path / "top.txt").write_bytes(b"top")
+        (tmp_path / "a" / "b" / "deep.txt").write_bytes(b"deep")
+        
+        result = sorted(iter_files(tmp_path))
+        
+        assert result == [
+            ("a/b/deep.txt", tmp_path / "a" / "b" / "deep.txt"),
+            ("top.txt", tmp_path / "top.txt")
+        ]
+    
+    def test_iter_files_skips_symlinked_directories(self, tmp_path):
+        (tmp_path / "real").mkdir()
+        (tmp_path / "real" / "file.txt").write_bytes(b"content")
+        (tmp_path / "linked").symlink_to(tmp_path / "real", target_is_directory=True)
+        
+        assert [rel for rel, _ in iter_files(tmp_path)] == ["real/file.txt"]
 
 
 class TestComposerInstallerEdgeCases:
@@ -323,26 +354,17 @@ class TestComposerInstallerEdgeCases:
         assert result.error_message is None
     
     @patch('subprocess.run')
-    @patch('os.walk')
-    def test_composer_install_with_deep_nesting(self, mock_walk, mock_run, tmp_path):
+    def test_composer_install_with_deep_nesting(self, mock_run, tmp_path):
         """Test composer install with deeply nested vendor structure."""
         mock_run.return_value = Mock(returncode=0, stderr="")
         
-        # Mock a deeply nested structure
+        # Create a deeply nested structure
         vendor = tmp_path / "vendor"
         deep_path = vendor / "company" / "package" / "src" / "Utils"
         deep_path.mkdir(parents=True)
         deep_file = deep_path / "Helper.php"
         deep_file.write_bytes(b"<?php class Helper {}")
         
-        mock_walk.return_value = [
-            (str(vendor), ["company"], []),
-            (str(vendor / "company"), ["package"], []),
-            (str(vendor / "company" / "package"), ["src"], []),
-            (str(vendor / "company" / "package" / "src"), ["Utils"], []),
-            (str(deep_path), [], ["Helper.php"])
-        ]
-        
         installer = ComposerInstaller("8.1.0")
         result = installer.install(str(tmp_path))
         